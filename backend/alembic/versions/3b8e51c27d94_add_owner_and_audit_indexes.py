@@ -0,0 +1,32 @@
+"""Add owner and audit composite indexes
+
+Revision ID: 3b8e51c27d94
+Revises: 0fef9c6f0c02
+Create Date: 2026-10-15 09:12:41.503218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b8e51c27d94'
+down_revision: Union[str, Sequence[str], None] = '0fef9c6f0c02'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('idx_files_owner_created', 'file_metadata', ['owner_id', 'created_at'], unique=False)
+    op.create_index('idx_files_owner_status', 'file_metadata', ['owner_id', 'upload_status'], unique=False)
+    op.create_index('idx_audit_user_ts', 'audit_logs', ['user_id', 'timestamp'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_audit_user_ts', table_name='audit_logs')
+    op.drop_index('idx_files_owner_status', table_name='file_metadata')
+    op.drop_index('idx_files_owner_created', table_name='file_metadata')
@@ -0,0 +1,28 @@
+"""Add multipart_upload_id to file_metadata
+
+Revision ID: 5e1f7a3c9b28
+Revises: 9d4c2a7f1e63
+Create Date: 2026-10-15 11:42:06.315790
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e1f7a3c9b28'
+down_revision: Union[str, Sequence[str], None] = '9d4c2a7f1e63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('file_metadata', sa.Column('multipart_upload_id', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('file_metadata', 'multipart_upload_id')
@@ -0,0 +1,55 @@
+"""Use timezone-aware server-side timestamps
+
+Revision ID: 9d4c2a7f1e63
+Revises: 3b8e51c27d94
+Create Date: 2026-10-15 10:03:17.884512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4c2a7f1e63'
+down_revision: Union[str, Sequence[str], None] = '3b8e51c27d94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Existing values were written with datetime.utcnow(), so they are UTC.
+TIMESTAMP_COLUMNS = [
+    ('users', 'created_at'),
+    ('file_metadata', 'created_at'),
+    ('file_metadata', 'updated_at'),
+    ('audit_logs', 'timestamp'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, column in TIMESTAMP_COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            existing_type=sa.DateTime(),
+            type_=sa.DateTime(timezone=True),
+            existing_nullable=True,
+            server_default=sa.text('now()'),
+            postgresql_using=f"{column} AT TIME ZONE 'UTC'",
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, column in TIMESTAMP_COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            existing_type=sa.DateTime(timezone=True),
+            type_=sa.DateTime(),
+            existing_nullable=True,
+            server_default=None,
+            postgresql_using=f"{column} AT TIME ZONE 'UTC'",
+        )
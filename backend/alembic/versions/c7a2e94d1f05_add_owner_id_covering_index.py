@@ -0,0 +1,38 @@
+"""Add covering (owner_id, id) index on file_metadata
+
+Revision ID: c7a2e94d1f05
+Revises: 5e1f7a3c9b28
+Create Date: 2026-10-15 12:20:54.097133
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7a2e94d1f05'
+down_revision: Union[str, Sequence[str], None] = '5e1f7a3c9b28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_files_owner_id',
+            'file_metadata',
+            ['owner_id', 'id'],
+            unique=False,
+            postgresql_include=['upload_status', 'mime_type', 'created_at', 'multipart_upload_id'],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_files_owner_id', table_name='file_metadata', postgresql_concurrently=True)
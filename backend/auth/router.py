@@ -1,37 +1,49 @@
+import uuid
+
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import bindparam, select
 from sqlalchemy.orm import Session
 
 from . import schemas, security
 from core import models
 from core.database import get_db
+from tasks.audit import enqueue_audit
 
 router = APIRouter()
 
+# Built once at import so each request only binds parameters
+_email_exists_stmt = select(1).where(models.User.email == bindparam("email"))
+_login_stmt = select(models.User.id, models.User.hashed_password).where(
+    models.User.email == bindparam("email")
+)
+
 @router.post("/register", response_model=schemas.User)
 def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    db_user = db.query(models.User).filter(models.User.email == user.email).first()
-    if db_user:
+    if db.execute(_email_exists_stmt, {"email": user.email}).scalar():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered",
         )
     hashed_password = security.get_password_hash(user.password)
-    new_user = models.User(email=user.email, hashed_password=hashed_password)
+    user_id = uuid.uuid4()
+    new_user = models.User(id=user_id, email=user.email, hashed_password=hashed_password)
     db.add(new_user)
     db.commit()
-    db.refresh(new_user)
+    enqueue_audit(user_id, "user_register")
     return new_user
 
 from fastapi.security import OAuth2PasswordRequestForm
 
 @router.post("/login", response_model=schemas.Token)
 def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.email == form_data.username).first()
+    # Only the id and hash are needed here, so skip hydrating a full User.
+    user = db.execute(_login_stmt, {"email": form_data.username}).first()
     if not user or not security.verify_password(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token = security.create_access_token(data={"sub": user.email})
+    access_token = security.create_access_token(data={"sub": form_data.username})
+    enqueue_audit(user.id, "user_login")
     return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
@@ -1,29 +1,103 @@
-import os
+import hmac
+import secrets
+import time
 from datetime import datetime, timedelta, timezone
+from hashlib import blake2b
+from cachetools import TTLCache
 from passlib.context import CryptContext
-from jose import JWTError, jwt
+from jose import JWTError, jwk, jwt
+
+from core.config import settings
 
 # Password Hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Built once per process with explicit cost parameters so passlib never has to
+# auto-tune. bcrypt stays listed so existing hashes still verify.
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__time_cost=3,
+    argon2__memory_cost=65536,
+    argon2__parallelism=4,
+)
+
+# Resolved once so argon2 hashes skip the context's per-call scheme lookup.
+# The handler compares digests in constant time internally.
+_argon2_hasher = pwd_context.handler("argon2")
+
+# Short-lived cache of successful verifications so repeated identical
+# (password, hash) pairs skip the KDF. Failures are never cached: a wrong
+# password always goes through the full KDF and constant-time comparison.
+# Keys are HMACed with a per-process pepper so plaintext passwords never sit
+# in memory as cache keys.
+_PEPPER = secrets.token_bytes(32)
+_verify_cache = TTLCache(maxsize=4096, ttl=30)
+
+def _verify_cache_key(plain_password: str, hashed_password: str) -> bytes:
+    return hmac.new(
+        _PEPPER,
+        plain_password.encode() + b"|" + hashed_password.encode(),
+        "sha256",
+    ).digest()
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    key = _verify_cache_key(plain_password, hashed_password)
+    if key in _verify_cache:
+        return True
+    if hashed_password.startswith("$argon2"):
+        result = _argon2_hasher.verify(plain_password, hashed_password)
+    else:
+        result = pwd_context.verify(plain_password, hashed_password)
+    if result:
+        _verify_cache[key] = True
+    return result
 
 def get_password_hash(password):
     return pwd_context.hash(password)
 
 # JWT Token Management
-# In a real app, these would be in a secure config/env
-SECRET_KEY = os.getenv("SECRET_KEY", "a_very_secret_key_that_should_be_changed")
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
+SECRET_KEY = settings.secret_key
+ALGORITHM = settings.algorithm
+ACCESS_TOKEN_EXPIRE_MINUTES = settings.access_token_expire_minutes
+
+# Constructed once; jose otherwise rebuilds the HMAC key on every encode/decode.
+_jwt_key = jwk.construct(SECRET_KEY, ALGORITHM)
+
+# Signed tokens are reused per (claims, exp), so a token is only shared with
+# requests that would have produced the identical token (exp has one-second
+# resolution). Decoded claims are reused for a few seconds so hot clients
+# don't pay HMAC + JSON on every call.
+_JWT_VERIFY_TTL = 5
+_jwt_verify_cache = TTLCache(maxsize=10_000, ttl=_JWT_VERIFY_TTL)
+_jwt_issue_cache = TTLCache(maxsize=10_000, ttl=1)
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
+    if expires_delta is None:
+        expires_delta = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    # JWT exp is whole seconds; jose would truncate a datetime the same way
+    exp = int((datetime.now(timezone.utc) + expires_delta).timestamp())
+
+    issue_key = (tuple(sorted(data.items())), exp)
+    cached = _jwt_issue_cache.get(issue_key)
+    if cached is not None:
+        return cached
+
     to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
-    else:
-        expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
\ No newline at end of file
+    to_encode.update({"exp": exp})
+    encoded_jwt = jwt.encode(to_encode, _jwt_key, algorithm=ALGORITHM)
+    _jwt_issue_cache[issue_key] = encoded_jwt
+    return encoded_jwt
+
+def decode_access_token(token: str) -> dict:
+    """Decode and verify a JWT, raising JWTError if it is invalid."""
+    key = blake2b(token.encode(), digest_size=16).digest()
+    payload = _jwt_verify_cache.get(key)
+    if payload is not None:
+        # Callers get their own copy, so mutating it can't leak into other requests
+        return dict(payload)
+    payload = jwt.decode(token, _jwt_key, algorithms=[ALGORITHM])
+    # Only cache tokens that outlive the cache entry, so a hit can never
+    # hand back claims for an expired token.
+    exp = payload.get("exp")
+    if exp is not None and exp - time.time() > _JWT_VERIFY_TTL:
+        _jwt_verify_cache[key] = dict(payload)
+    return payload
\ No newline at end of file
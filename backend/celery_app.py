@@ -2,9 +2,26 @@
 Celery application configuration for FileGuard
 Handles async tasks like antivirus scanning, email notifications, etc.
 """
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Coroutine, Optional
+
+import orjson
 from celery import Celery
+from celery.signals import worker_process_init
+from kombu.serialization import register
 from core.config import settings
 
+# orjson is several times faster than stdlib json and handles UUID/datetime natively
+register(
+    'orjson',
+    orjson.dumps,
+    orjson.loads,
+    content_type='application/x-orjson',
+    content_encoding='utf-8',
+)
+
 # Create Celery app
 celery_app = Celery(
     "fileguard",
@@ -14,9 +31,9 @@ celery_app = Celery(
 
 # Celery configuration
 celery_app.conf.update(
-    task_serializer='json',
-    accept_content=['json'],
-    result_serializer='json',
+    task_serializer='orjson',
+    accept_content=['orjson', 'json'],
+    result_serializer='orjson',
     timezone='UTC',
     enable_utc=True,
     task_track_started=True,
@@ -25,7 +42,49 @@ celery_app.conf.update(
     worker_prefetch_multiplier=1,
     worker_max_tasks_per_child=1000,
     result_expires=3600,  # Results expire after 1 hour
+    task_ignore_result=True,  # Tasks that need results opt in explicitly
+    task_acks_late=False,
+    broker_pool_limit=20,  # Reuse broker connections across producers
+    broker_transport_options={
+        'socket_keepalive': True,
+        'health_check_interval': 30,
+    },
+    task_routes={
+        'tasks.write_audit': {'queue': 'audit'},  # Low-priority, fire-and-forget
+    },
 )
 
 # Auto-discover tasks from modules
 celery_app.autodiscover_tasks(['tasks'])
+
+
+# One event loop per worker process, running in a daemon thread, so tasks
+# don't build and tear down a loop (and its executor) on every call
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+_worker_loop_lock = threading.Lock()
+
+
+def get_worker_loop() -> asyncio.AbstractEventLoop:
+    """Get the worker's persistent event loop, starting it on first use"""
+    global _worker_loop
+
+    with _worker_loop_lock:
+        if _worker_loop is None:
+            loop = asyncio.new_event_loop()
+            loop.set_default_executor(ThreadPoolExecutor(max_workers=32, thread_name_prefix="worker-loop"))
+            threading.Thread(target=loop.run_forever, name="worker-event-loop", daemon=True).start()
+            _worker_loop = loop
+        return _worker_loop
+
+
+@worker_process_init.connect
+def _start_worker_loop(**kwargs) -> None:
+    global _worker_loop
+    # A loop inherited through fork has no running thread in the child
+    _worker_loop = None
+    get_worker_loop()
+
+
+def run_async(coro: Coroutine[Any, Any, Any]) -> Any:
+    """Run a coroutine on the worker's event loop and block until it finishes"""
+    return asyncio.run_coroutine_threadsafe(coro, get_worker_loop()).result()
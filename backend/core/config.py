@@ -3,7 +3,8 @@ Enhanced Configuration Management for FileGuard
 Uses pydantic-settings for type-safe environment variable handling
 """
 import os
-from typing import Optional, List
+from functools import cached_property, lru_cache
+from typing import Optional, List, FrozenSet
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -12,6 +13,7 @@ class Settings(BaseSettings):
     """
     Application settings loaded from environment variables.
     All values can be overridden via .env file or environment variables.
+    Derived values (URLs, parsed lists) are computed once per instance.
     """
 
     model_config = SettingsConfigDict(
@@ -67,7 +69,7 @@ class Settings(BaseSettings):
     # SQLAlchemy
     sqlalchemy_echo: bool = Field(default=False, description="Echo SQL queries (debug)")
 
-    @property
+    @cached_property
     def database_url(self) -> str:
         """Construct database URL from components"""
         return (
@@ -83,7 +85,7 @@ class Settings(BaseSettings):
     redis_password: Optional[str] = Field(default=None, description="Redis password")
     redis_db: int = Field(default=0, description="Redis database number")
 
-    @property
+    @cached_property
     def redis_url(self) -> str:
         """Construct Redis URL"""
         if self.redis_password:
@@ -94,12 +96,12 @@ class Settings(BaseSettings):
     celery_broker_url: Optional[str] = Field(default=None, description="Celery broker URL")
     celery_result_backend: Optional[str] = Field(default=None, description="Celery result backend URL")
 
-    @property
+    @cached_property
     def get_celery_broker_url(self) -> str:
         """Get Celery broker URL (defaults to Redis)"""
         return self.celery_broker_url or self.redis_url
 
-    @property
+    @cached_property
     def get_celery_result_backend(self) -> str:
         """Get Celery result backend URL (defaults to Redis)"""
         return self.celery_result_backend or self.redis_url
@@ -115,6 +117,7 @@ class Settings(BaseSettings):
     minio_secret_key: str = Field(default="minioadmin", description="MinIO secret key")
     minio_secure: bool = Field(default=False, description="Use HTTPS for MinIO")
     minio_bucket: str = Field(default="fileguard-files", description="MinIO bucket name")
+    minio_max_pool_connections: int = Field(default=64, description="Keep-alive connections per MinIO client")
 
     # AWS S3
     aws_access_key_id: Optional[str] = Field(default=None, description="AWS access key ID")
@@ -122,6 +125,9 @@ class Settings(BaseSettings):
     aws_region: str = Field(default="us-east-1", description="AWS region")
     s3_bucket: str = Field(default="fileguard-files", description="S3 bucket name")
     s3_endpoint_url: Optional[str] = Field(default=None, description="Custom S3 endpoint URL")
+    s3_max_pool_connections: int = Field(default=64, description="Keep-alive connections in the S3 client pool")
+    s3_max_inflight: int = Field(default=128, description="Max concurrent S3 requests per process")
+    s3_accelerate: bool = Field(default=False, description="Use the S3 Transfer Acceleration endpoint")
 
     # ==========================================
     # ClamAV Antivirus
@@ -130,27 +136,33 @@ class Settings(BaseSettings):
     clamav_host: str = Field(default="localhost", description="ClamAV host")
     clamav_port: int = Field(default=3310, description="ClamAV port")
     clamav_timeout: int = Field(default=120, description="ClamAV scan timeout in seconds")
+    clamav_max_stream_bytes: int = Field(default=25 * 1024 * 1024, description="Largest file sent to ClamAV (match its StreamMaxLength)")
 
     # ==========================================
     # CORS Settings
     # ==========================================
     cors_origins: str = Field(
-        default="http://localhost:3000,http://localhost:8000",
+        default="http://localhost:3000,http://localhost:3001,http://localhost:8000",
         description="Comma-separated list of allowed CORS origins"
     )
     cors_allow_credentials: bool = Field(default=True, description="Allow credentials in CORS")
     cors_allow_methods: str = Field(default="GET,POST,PUT,DELETE,OPTIONS,PATCH", description="Allowed HTTP methods")
     cors_allow_headers: str = Field(default="*", description="Allowed headers")
 
-    @property
-    def cors_origins_list(self) -> List[str]:
-        """Convert CORS origins string to list"""
-        return [origin.strip() for origin in self.cors_origins.split(",")]
+    @cached_property
+    def cors_origins_list(self) -> FrozenSet[str]:
+        """Convert CORS origins string to a set (O(1) membership checks)"""
+        return frozenset(origin.strip() for origin in self.cors_origins.split(","))
 
-    @property
-    def cors_methods_list(self) -> List[str]:
-        """Convert CORS methods string to list"""
-        return [method.strip() for method in self.cors_allow_methods.split(",")]
+    @cached_property
+    def cors_methods_list(self) -> FrozenSet[str]:
+        """Convert CORS methods string to a set (O(1) membership checks)"""
+        return frozenset(method.strip() for method in self.cors_allow_methods.split(","))
+
+    @cached_property
+    def cors_headers_list(self) -> List[str]:
+        """Convert CORS headers string to list"""
+        return [header.strip() for header in self.cors_allow_headers.split(",")]
 
     # ==========================================
     # File Upload Settings
@@ -159,18 +171,19 @@ class Settings(BaseSettings):
     max_chunk_size_mb: int = Field(default=10, description="Maximum chunk size in MB")
     allowed_extensions: str = Field(default="*", description="Allowed file extensions (comma-separated or *)")
     storage_path: str = Field(default="/var/lib/fileguard/storage", description="Local storage path")
+    stream_chunk_size: int = Field(default=1024 * 1024, description="Read size in bytes when streaming downloads")
 
-    @property
+    @cached_property
     def max_file_size_bytes(self) -> int:
         """Convert max file size to bytes"""
         return self.max_file_size_mb * 1024 * 1024
 
-    @property
+    @cached_property
     def max_chunk_size_bytes(self) -> int:
         """Convert max chunk size to bytes"""
         return self.max_chunk_size_mb * 1024 * 1024
 
-    @property
+    @cached_property
     def allowed_extensions_list(self) -> List[str]:
         """Get list of allowed extensions"""
         if self.allowed_extensions == "*":
@@ -278,12 +291,32 @@ class Settings(BaseSettings):
                 raise ValueError("Default database password detected in production!")
 
 
-# Create global settings instance
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the process-wide Settings instance (usable as a FastAPI dependency)"""
+    return Settings()
 
 
-# Export for backwards compatibility
-DATABASE_URL = settings.database_url
-SECRET_KEY = settings.secret_key
-ALGORITHM = settings.algorithm
-ACCESS_TOKEN_EXPIRE_MINUTES = settings.access_token_expire_minutes
+# Create global settings instance
+settings = get_settings()
+
+
+# Legacy module-level names (e.g. `from core.config import DATABASE_URL`),
+# resolved lazily from the single settings instance (PEP 562).
+_LEGACY_ATTRS = {
+    "DATABASE_URL": "database_url",
+    "SECRET_KEY": "secret_key",
+    "ALGORITHM": "algorithm",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "access_token_expire_minutes",
+    "POSTGRES_SERVER": "postgres_server",
+    "POSTGRES_PORT": "postgres_port",
+    "POSTGRES_USER": "postgres_user",
+    "POSTGRES_PASSWORD": "postgres_password",
+    "POSTGRES_DB": "postgres_db",
+}
+
+
+def __getattr__(name: str):
+    if name in _LEGACY_ATTRS:
+        return getattr(settings, _LEGACY_ATTRS[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
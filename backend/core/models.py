@@ -1,61 +1,101 @@
 import uuid
 from datetime import datetime
+from typing import Any, List, Optional
 
 from sqlalchemy import (
-    create_engine,
-    Column,
     String,
     DateTime,
     ForeignKey,
     JSON,
-    Integer,
     Text,
     BigInteger,
+    Index,
 )
-from sqlalchemy.orm import declarative_base, sessionmaker, relationship
+from sqlalchemy.sql import func
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID
 
-Base = declarative_base()
+
+class Base(DeclarativeBase):
+    pass
 
 class User(Base):
     __tablename__ = "users"
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    email = Column(String, unique=True, index=True, nullable=False)
-    hashed_password = Column(String, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    email: Mapped[str] = mapped_column(String, unique=True, index=True, nullable=False)
+    hashed_password: Mapped[str] = mapped_column(String, nullable=False)
+    created_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
 
-    files = relationship("FileMetadata", back_populates="owner")
-    audit_logs = relationship("AuditLog", back_populates="user")
+    files: Mapped[List["FileMetadata"]] = relationship("FileMetadata", back_populates="owner")
+    audit_logs: Mapped[List["AuditLog"]] = relationship("AuditLog", back_populates="user")
 
 class FileMetadata(Base):
     __tablename__ = "file_metadata"
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    owner_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    owner_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id"), nullable=False
+    )
 
     # Unencrypted metadata
-    size_bytes = Column(BigInteger, nullable=False)
-    mime_type = Column(String, nullable=False)
-    original_filename_encrypted = Column(Text, nullable=False) # Encrypted original filename
+    size_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    mime_type: Mapped[str] = mapped_column(String, nullable=False)
+    # Encrypted original filename
+    original_filename_encrypted: Mapped[str] = mapped_column(Text, nullable=False)
 
     # Encrypted fields
-    wrapped_dek = Column(Text, nullable=False) # Data Encryption Key wrapped with KEK
+    # Data Encryption Key wrapped with KEK
+    wrapped_dek: Mapped[str] = mapped_column(Text, nullable=False)
 
     # Status fields
-    upload_status = Column(String, default="pending", nullable=False) # e.g., pending, complete, failed, scanning
-    av_scan_status = Column(String, default="pending", nullable=False) # e.g., pending, clean, infected
-    av_scan_result = Column(String, nullable=True)
+    # e.g., pending, complete, failed, scanning
+    upload_status: Mapped[str] = mapped_column(String, default="pending", nullable=False)
+    # e.g., pending, clean, infected
+    av_scan_status: Mapped[str] = mapped_column(String, default="pending", nullable=False)
+    av_scan_result: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+
+    # Storage-side upload id (e.g. S3/MinIO multipart UploadId) while upload_status is pending
+    multipart_upload_id: Mapped[Optional[str]] = mapped_column(String, nullable=True)
 
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    updated_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
 
-    owner = relationship("User", back_populates="files")
+    owner: Mapped["User"] = relationship("User", back_populates="files")
+
+    __table_args__ = (
+        Index("idx_files_owner_created", "owner_id", "created_at"),
+        Index("idx_files_owner_status", "owner_id", "upload_status"),
+        # Covers the per-request ownership check as an index-only scan
+        Index(
+            "idx_files_owner_id",
+            "owner_id",
+            "id",
+            postgresql_include=["upload_status", "mime_type", "created_at", "multipart_upload_id"],
+        ),
+    )
 
 class AuditLog(Base):
     __tablename__ = "audit_logs"
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True) # Can be null for system events
-    action = Column(String, nullable=False) # e.g., 'user_login', 'file_upload', 'file_download'
-    details = Column(JSON, nullable=True)
-    timestamp = Column(DateTime, default=datetime.utcnow)
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # Can be null for system events
+    user_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id"), nullable=True
+    )
+    # e.g., 'user_login', 'file_upload', 'file_download'
+    action: Mapped[str] = mapped_column(String, nullable=False)
+    details: Mapped[Optional[Any]] = mapped_column(JSON, nullable=True)
+    timestamp: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+    user: Mapped[Optional["User"]] = relationship("User", back_populates="audit_logs")
 
-    user = relationship("User", back_populates="audit_logs")
\ No newline at end of file
+    __table_args__ = (
+        Index("idx_audit_user_ts", "user_id", "timestamp"),
+    )
+    __mapper_args__ = {"eager_defaults": False}
\ No newline at end of file
@@ -4,6 +4,7 @@ Includes: File versioning, sharing, folders, tags, 2FA, etc.
 """
 import uuid
 from datetime import datetime
+from typing import TYPE_CHECKING, Any, Optional
 from sqlalchemy import (
     Column,
     String,
@@ -17,10 +18,13 @@ from sqlalchemy import (
     Index,
     Table,
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID
 from .models import Base
 
+if TYPE_CHECKING:
+    from .models import FileMetadata, User
+
 
 # ==========================================
 # Association Tables (Many-to-Many)
@@ -30,8 +34,15 @@ from .models import Base
 file_tags = Table(
     'file_tags',
     Base.metadata,
-    Column('file_id', UUID(as_uuid=True), ForeignKey('file_metadata.id', ondelete='CASCADE'), primary_key=True),
-    Column('tag_id', UUID(as_uuid=True), ForeignKey('tags.id', ondelete='CASCADE'), primary_key=True),
+    Column(
+        'file_id',
+        UUID(as_uuid=True),
+        ForeignKey('file_metadata.id', ondelete='CASCADE'),
+        primary_key=True,
+    ),
+    Column(
+        'tag_id', UUID(as_uuid=True), ForeignKey('tags.id', ondelete='CASCADE'), primary_key=True
+    ),
 )
 
 
@@ -43,29 +54,36 @@ class UserSettings(Base):
     """User preferences and settings"""
     __tablename__ = "user_settings"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete='CASCADE'), unique=True, nullable=False)
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete='CASCADE'), unique=True, nullable=False
+    )
 
     # 2FA Settings
-    two_factor_enabled = Column(Boolean, default=False, nullable=False)
-    two_factor_secret = Column(String, nullable=True)  # TOTP secret
-    backup_codes = Column(JSON, nullable=True)  # List of backup codes
+    two_factor_enabled: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    two_factor_secret: Mapped[Optional[str]] = mapped_column(String, nullable=True)  # TOTP secret
+    backup_codes: Mapped[Optional[Any]] = mapped_column(JSON, nullable=True)  # List of backup codes
 
     # Preferences
-    theme = Column(String, default="light", nullable=False)  # light, dark, auto
-    language = Column(String, default="en", nullable=False)
-    timezone = Column(String, default="UTC", nullable=False)
-    email_notifications = Column(Boolean, default=True, nullable=False)
+    theme: Mapped[str] = mapped_column(String, default="light", nullable=False)  # light, dark, auto
+    language: Mapped[str] = mapped_column(String, default="en", nullable=False)
+    timezone: Mapped[str] = mapped_column(String, default="UTC", nullable=False)
+    email_notifications: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
 
     # Storage quotas
-    storage_quota_bytes = Column(BigInteger, default=10*1024*1024*1024, nullable=False)  # 10GB default
-    storage_used_bytes = Column(BigInteger, default=0, nullable=False)
+    # 10GB default
+    storage_quota_bytes: Mapped[int] = mapped_column(
+        BigInteger, default=10*1024*1024*1024, nullable=False
+    )
+    storage_used_bytes: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
 
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
 
     # Relationships
-    user = relationship("User", backref="settings")
+    user: Mapped["User"] = relationship("User", backref="settings")
 
 
 # ==========================================
@@ -76,20 +94,28 @@ class Folder(Base):
     """Folder/directory structure for file organization"""
     __tablename__ = "folders"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    owner_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete='CASCADE'), nullable=False)
-    parent_folder_id = Column(UUID(as_uuid=True), ForeignKey("folders.id", ondelete='CASCADE'), nullable=True)
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    owner_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete='CASCADE'), nullable=False
+    )
+    parent_folder_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("folders.id", ondelete='CASCADE'), nullable=True
+    )
 
-    name_encrypted = Column(Text, nullable=False)  # Encrypted folder name
-    path = Column(Text, nullable=False)  # Full path for quick lookups
-    color = Column(String, nullable=True)  # UI color tag
+    name_encrypted: Mapped[str] = mapped_column(Text, nullable=False)  # Encrypted folder name
+    path: Mapped[str] = mapped_column(Text, nullable=False)  # Full path for quick lookups
+    color: Mapped[Optional[str]] = mapped_column(String, nullable=True)  # UI color tag
 
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
 
     # Relationships
-    owner = relationship("User", backref="folders")
-    parent_folder = relationship("Folder", remote_side=[id], backref="subfolders")
+    owner: Mapped["User"] = relationship("User", backref="folders")
+    parent_folder: Mapped[Optional["Folder"]] = relationship(
+        "Folder", remote_side=[id], backref="subfolders"
+    )
 
     __table_args__ = (
         Index('idx_folder_owner_parent', 'owner_id', 'parent_folder_id'),
@@ -104,25 +130,30 @@ class FileVersion(Base):
     """File version history"""
     __tablename__ = "file_versions"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    file_id = Column(UUID(as_uuid=True), ForeignKey("file_metadata.id", ondelete='CASCADE'), nullable=False)
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    file_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("file_metadata.id", ondelete='CASCADE'), nullable=False
+    )
 
-    version_number = Column(Integer, nullable=False)
-    size_bytes = Column(BigInteger, nullable=False)
-    storage_key = Column(Text, nullable=False)  # Storage location of this version
+    version_number: Mapped[int] = mapped_column(Integer, nullable=False)
+    size_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    # Storage location of this version
+    storage_key: Mapped[str] = mapped_column(Text, nullable=False)
 
     # Metadata at time of version
-    wrapped_dek = Column(Text, nullable=False)
-    mime_type = Column(String, nullable=False)
+    wrapped_dek: Mapped[str] = mapped_column(Text, nullable=False)
+    mime_type: Mapped[str] = mapped_column(String, nullable=False)
 
     # Version metadata
-    change_description = Column(Text, nullable=True)
-    created_by = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    change_description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_by: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id"), nullable=False
+    )
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.utcnow)
 
     # Relationships
-    file = relationship("FileMetadata", backref="versions")
-    creator = relationship("User")
+    file: Mapped["FileMetadata"] = relationship("FileMetadata", backref="versions")
+    creator: Mapped["User"] = relationship("User")
 
     __table_args__ = (
         Index('idx_version_file_number', 'file_id', 'version_number'),
@@ -137,27 +168,39 @@ class FileShare(Base):
     """File sharing permissions"""
     __tablename__ = "file_shares"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    file_id = Column(UUID(as_uuid=True), ForeignKey("file_metadata.id", ondelete='CASCADE'), nullable=False)
-    shared_with_user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete='CASCADE'), nullable=False)
-    shared_by_user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    file_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("file_metadata.id", ondelete='CASCADE'), nullable=False
+    )
+    shared_with_user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete='CASCADE'), nullable=False
+    )
+    shared_by_user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id"), nullable=False
+    )
 
     # Permissions
-    permission_level = Column(String, nullable=False)  # view, download, edit, admin
-    can_reshare = Column(Boolean, default=False, nullable=False)
+    # view, download, edit, admin
+    permission_level: Mapped[str] = mapped_column(String, nullable=False)
+    can_reshare: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
 
     # Sharing metadata
-    expires_at = Column(DateTime, nullable=True)  # Optional expiration
-    access_count = Column(Integer, default=0, nullable=False)
-    last_accessed_at = Column(DateTime, nullable=True)
-
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Optional expiration
+    expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    access_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    last_accessed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
 
     # Relationships
-    file = relationship("FileMetadata", backref="shares")
-    shared_with = relationship("User", foreign_keys=[shared_with_user_id], backref="shared_files")
-    shared_by = relationship("User", foreign_keys=[shared_by_user_id])
+    file: Mapped["FileMetadata"] = relationship("FileMetadata", backref="shares")
+    shared_with: Mapped["User"] = relationship(
+        "User", foreign_keys=[shared_with_user_id], backref="shared_files"
+    )
+    shared_by: Mapped["User"] = relationship("User", foreign_keys=[shared_by_user_id])
 
     __table_args__ = (
         Index('idx_share_user_file', 'shared_with_user_id', 'file_id'),
@@ -168,25 +211,32 @@ class ShareLink(Base):
     """Public share links for files"""
     __tablename__ = "share_links"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    file_id = Column(UUID(as_uuid=True), ForeignKey("file_metadata.id", ondelete='CASCADE'), nullable=False)
-    created_by_user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    file_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("file_metadata.id", ondelete='CASCADE'), nullable=False
+    )
+    created_by_user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id"), nullable=False
+    )
 
     # Link configuration
-    link_token = Column(String, unique=True, index=True, nullable=False)  # Random token for URL
-    password_hash = Column(String, nullable=True)  # Optional password protection
-    max_downloads = Column(Integer, nullable=True)  # Optional download limit
-    download_count = Column(Integer, default=0, nullable=False)
+    # Random token for URL
+    link_token: Mapped[str] = mapped_column(String, unique=True, index=True, nullable=False)
+    # Optional password protection
+    password_hash: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    # Optional download limit
+    max_downloads: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    download_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
 
-    expires_at = Column(DateTime, nullable=True)
-    is_active = Column(Boolean, default=True, nullable=False)
+    expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
 
-    created_at = Column(DateTime, default=datetime.utcnow)
-    last_accessed_at = Column(DateTime, nullable=True)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.utcnow)
+    last_accessed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
 
     # Relationships
-    file = relationship("FileMetadata", backref="share_links")
-    created_by = relationship("User")
+    file: Mapped["FileMetadata"] = relationship("FileMetadata", backref="share_links")
+    created_by: Mapped["User"] = relationship("User")
 
 
 # ==========================================
@@ -197,16 +247,18 @@ class Tag(Base):
     """User-defined tags for file organization"""
     __tablename__ = "tags"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    owner_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete='CASCADE'), nullable=False)
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    owner_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete='CASCADE'), nullable=False
+    )
 
-    name = Column(String, nullable=False)
-    color = Column(String, nullable=True)  # Hex color code for UI
+    name: Mapped[str] = mapped_column(String, nullable=False)
+    color: Mapped[Optional[str]] = mapped_column(String, nullable=True)  # Hex color code for UI
 
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.utcnow)
 
     # Relationships
-    owner = relationship("User", backref="tags")
+    owner: Mapped["User"] = relationship("User", backref="tags")
 
     __table_args__ = (
         Index('idx_tag_owner_name', 'owner_id', 'name'),
@@ -221,21 +273,31 @@ class FileComment(Base):
     """Comments on files for collaboration"""
     __tablename__ = "file_comments"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    file_id = Column(UUID(as_uuid=True), ForeignKey("file_metadata.id", ondelete='CASCADE'), nullable=False)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete='CASCADE'), nullable=False)
-    parent_comment_id = Column(UUID(as_uuid=True), ForeignKey("file_comments.id", ondelete='CASCADE'), nullable=True)
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    file_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("file_metadata.id", ondelete='CASCADE'), nullable=False
+    )
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete='CASCADE'), nullable=False
+    )
+    parent_comment_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("file_comments.id", ondelete='CASCADE'), nullable=True
+    )
 
-    content = Column(Text, nullable=False)
-    is_resolved = Column(Boolean, default=False, nullable=False)
+    content: Mapped[str] = mapped_column(Text, nullable=False)
+    is_resolved: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
 
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
 
     # Relationships
-    file = relationship("FileMetadata", backref="comments")
-    user = relationship("User", backref="comments")
-    parent_comment = relationship("FileComment", remote_side=[id], backref="replies")
+    file: Mapped["FileMetadata"] = relationship("FileMetadata", backref="comments")
+    user: Mapped["User"] = relationship("User", backref="comments")
+    parent_comment: Mapped[Optional["FileComment"]] = relationship(
+        "FileComment", remote_side=[id], backref="replies"
+    )
 
     __table_args__ = (
         Index('idx_comment_file', 'file_id', 'created_at'),
@@ -250,25 +312,32 @@ class Notification(Base):
     """User notifications"""
     __tablename__ = "notifications"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete='CASCADE'), nullable=False)
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete='CASCADE'), nullable=False
+    )
 
-    notification_type = Column(String, nullable=False)  # share, comment, scan_complete, etc.
-    title = Column(String, nullable=False)
-    message = Column(Text, nullable=False)
-    link = Column(String, nullable=True)  # Optional link to related resource
+    # share, comment, scan_complete, etc.
+    notification_type: Mapped[str] = mapped_column(String, nullable=False)
+    title: Mapped[str] = mapped_column(String, nullable=False)
+    message: Mapped[str] = mapped_column(Text, nullable=False)
+    # Optional link to related resource
+    link: Mapped[Optional[str]] = mapped_column(String, nullable=True)
 
-    is_read = Column(Boolean, default=False, nullable=False)
-    metadata = Column(JSON, nullable=True)  # Additional data
+    is_read: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    # 'metadata' is reserved on declarative classes; keep the column name, rename the attribute
+    # Additional data
+    extra_data: Mapped[Optional[Any]] = mapped_column("metadata", JSON, nullable=True)
 
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.utcnow)
 
     # Relationships
-    user = relationship("User", backref="notifications")
+    user: Mapped["User"] = relationship("User", backref="notifications")
 
     __table_args__ = (
         Index('idx_notification_user_read', 'user_id', 'is_read', 'created_at'),
     )
+    __mapper_args__ = {"eager_defaults": False}
 
 
 # ==========================================
@@ -279,20 +348,26 @@ class FileAnalytics(Base):
     """File access analytics"""
     __tablename__ = "file_analytics"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    file_id = Column(UUID(as_uuid=True), ForeignKey("file_metadata.id", ondelete='CASCADE'), nullable=False)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete='SET NULL'), nullable=True)
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    file_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("file_metadata.id", ondelete='CASCADE'), nullable=False
+    )
+    user_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete='SET NULL'), nullable=True
+    )
 
-    event_type = Column(String, nullable=False)  # view, download, share, edit
-    ip_address = Column(String, nullable=True)
-    user_agent = Column(String, nullable=True)
-    metadata = Column(JSON, nullable=True)
+    event_type: Mapped[str] = mapped_column(String, nullable=False)  # view, download, share, edit
+    ip_address: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    user_agent: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    extra_data: Mapped[Optional[Any]] = mapped_column("metadata", JSON, nullable=True)
 
-    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    created_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime, default=datetime.utcnow, index=True
+    )
 
     # Relationships
-    file = relationship("FileMetadata", backref="analytics")
-    user = relationship("User")
+    file: Mapped["FileMetadata"] = relationship("FileMetadata", backref="analytics")
+    user: Mapped[Optional["User"]] = relationship("User")
 
     __table_args__ = (
         Index('idx_analytics_file_date', 'file_id', 'created_at'),
@@ -308,22 +383,26 @@ class APIKey(Base):
     """API keys for programmatic access"""
     __tablename__ = "api_keys"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete='CASCADE'), nullable=False)
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete='CASCADE'), nullable=False
+    )
 
-    name = Column(String, nullable=False)  # User-friendly name
-    key_hash = Column(String, unique=True, index=True, nullable=False)  # Hashed API key
-    key_prefix = Column(String, nullable=False)  # First few chars for identification
+    name: Mapped[str] = mapped_column(String, nullable=False)  # User-friendly name
+    # Hashed API key
+    key_hash: Mapped[str] = mapped_column(String, unique=True, index=True, nullable=False)
+    # First few chars for identification
+    key_prefix: Mapped[str] = mapped_column(String, nullable=False)
 
-    scopes = Column(JSON, nullable=False)  # List of allowed operations
-    is_active = Column(Boolean, default=True, nullable=False)
+    scopes: Mapped[Any] = mapped_column(JSON, nullable=False)  # List of allowed operations
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
 
-    last_used_at = Column(DateTime, nullable=True)
-    expires_at = Column(DateTime, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    last_used_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.utcnow)
 
     # Relationships
-    user = relationship("User", backref="api_keys")
+    user: Mapped["User"] = relationship("User", backref="api_keys")
 
     __table_args__ = (
         Index('idx_apikey_user', 'user_id', 'is_active'),
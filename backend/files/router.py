@@ -1,32 +1,106 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from cachetools import TTLCache
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Header
+from sqlalchemy import Row, bindparam, select, update
 from sqlalchemy.orm import Session
+from typing import Optional, Tuple
+import asyncio
+import os
 import uuid
 
 from . import schemas
 from core import models
+from core.config import settings
 from core.database import get_db
 from auth.dependencies import get_current_user
+from storage import StorageBackend, UploadNotInProgressError, get_storage
 
 router = APIRouter()
 
-# This is a placeholder for S3/MinIO integration
-async def upload_chunk_to_storage(file_id: uuid.UUID, chunk: bytes):
-    # In a real implementation, this would upload to S3/MinIO
-    # For now, we'll just print a message
-    print(f"Uploading chunk for file {file_id}...")
-    return {"status": "ok"}
+# (file_id, owner_id) -> multipart upload id for uploads in progress, so chunk
+# requests skip the ownership query. Only touched from the event loop thread.
+# Entries are per process, so a short TTL bounds how long another worker's
+# completion can go unnoticed.
+_upload_cache = TTLCache(maxsize=10_000, ttl=60)
+
+
+def chunk_size(chunk: UploadFile) -> int:
+    """Size of an uploaded chunk, rejecting it if it exceeds the configured limit"""
+    size = chunk.size
+    if size is None:
+        size = chunk.file.seek(0, os.SEEK_END)
+        chunk.file.seek(0)
+    if size > settings.max_chunk_size_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="Chunk too large",
+        )
+    return size
+
+
+# Data-plane endpoints only need these columns; selecting them as a tuple
+# skips hydrating the ORM object and reading the wide encrypted text columns.
+_file_access_stmt = select(
+    models.FileMetadata.mime_type,
+    models.FileMetadata.upload_status,
+    models.FileMetadata.multipart_upload_id,
+).where(
+    models.FileMetadata.id == bindparam("file_id"),
+    models.FileMetadata.owner_id == bindparam("owner_id"),
+)
+
+
+def get_owned_file(db: Session, file_id: uuid.UUID, owner_id: uuid.UUID) -> Row:
+    """Load the access columns of a file owned by the user or raise 404 (blocking; call via asyncio.to_thread)"""
+    db_file = db.execute(_file_access_stmt, {"file_id": file_id, "owner_id": owner_id}).first()
+    if not db_file:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+    return db_file
+
+
+def mark_file_complete(db: Session, file_id: uuid.UUID, owner_id: uuid.UUID) -> models.FileMetadata:
+    """Mark a file complete and read it back in one UPDATE ... RETURNING round-trip"""
+    stmt = (
+        update(models.FileMetadata)
+        .where(models.FileMetadata.id == file_id, models.FileMetadata.owner_id == owner_id)
+        .values(upload_status="complete", multipart_upload_id=None)
+        .returning(models.FileMetadata)
+        .execution_options(populate_existing=True)
+    )
+    db_file = db.execute(stmt).scalar_one_or_none()
+    if not db_file:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+    db.commit()
+    return db_file
 
 
 @router.post("/upload/init", response_model=schemas.FileMetadata)
-def create_file_metadata(
+async def create_file_metadata(
     file_meta: schemas.FileMetadataCreate,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
+    storage: StorageBackend = Depends(get_storage),
 ):
-    db_file = models.FileMetadata(**file_meta.model_dump(), owner_id=current_user.id)
+    file_id = uuid.uuid4()
+    # Open the storage-side upload (MinIO multipart) up front so chunks can go
+    # straight into the final object
+    upload_id = await storage.init_upload(file_id, current_user.id)
+
+    db_file = models.FileMetadata(
+        **file_meta.model_dump(),
+        id=file_id,
+        owner_id=current_user.id,
+        multipart_upload_id=upload_id,
+    )
     db.add(db_file)
-    db.commit()
-    db.refresh(db_file)
+    # Server-side timestamps come back via INSERT ... RETURNING and the session
+    # doesn't expire on commit, so no refresh SELECT is needed.
+    try:
+        await asyncio.to_thread(db.commit)
+    except Exception:
+        # No row points at the upload, so cleanup would never find it
+        await storage.abort_upload(file_id, current_user.id, upload_id=upload_id)
+        raise
+    _upload_cache[(file_id, current_user.id)] = upload_id
     return db_file
 
 
@@ -34,17 +108,29 @@ def create_file_metadata(
 async def upload_file_chunk(
     file_id: uuid.UUID,
     chunk: UploadFile = File(...),
+    chunk_number: int = Form(..., ge=0, le=9999),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
+    storage: StorageBackend = Depends(get_storage),
 ):
-    # Verify the file belongs to the current user
-    db_file = db.query(models.FileMetadata).filter_by(id=file_id, owner_id=current_user.id).first()
-    if not db_file:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+    # Verify the file belongs to the current user, from the cache when possible
+    cache_key = (file_id, current_user.id)
+    try:
+        upload_id = _upload_cache[cache_key]
+    except KeyError:
+        db_file = await asyncio.to_thread(get_owned_file, db, file_id, current_user.id)
+        if db_file.upload_status != "pending":
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Upload is not in progress")
+        upload_id = _upload_cache[cache_key] = db_file.multipart_upload_id
 
-    # In a real implementation, you would stream the chunk to S3
-    chunk_content = await chunk.read()
-    await upload_chunk_to_storage(file_id, chunk_content)
+    # Storage reads the spooled upload file itself, off the event loop
+    size = chunk_size(chunk)
+    try:
+        await storage.upload_chunk(file_id, chunk_number, chunk.file, size, current_user.id, upload_id=upload_id)
+    except UploadNotInProgressError:
+        # Completed or aborted through another worker since it was cached
+        _upload_cache.pop(cache_key, None)
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Upload is not in progress")
 
     return {"status": "chunk received"}
 
@@ -56,41 +142,114 @@ def list_files(
     return db.query(models.FileMetadata).filter_by(owner_id=current_user.id).all()
 
 
-from fastapi.responses import StreamingResponse
-import io
+from fastapi.responses import FileResponse, StreamingResponse
+
+
+def parse_byte_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single-range "bytes=" header into inclusive offsets (None means the whole file)"""
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        return None
+
+    first, _, last = range_header[len("bytes="):].strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            # Suffix range: the last N bytes
+            start = max(size - int(last), 0)
+            end = size - 1
+    except ValueError:
+        return None
+
+    end = min(end, size - 1)
+    if start > end:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
+
 
 @router.get("/download/{file_id}")
 async def download_file(
     file_id: uuid.UUID,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
+    storage: StorageBackend = Depends(get_storage),
+    range_header: Optional[str] = Header(default=None, alias="Range"),
 ):
-    db_file = db.query(models.FileMetadata).filter_by(id=file_id, owner_id=current_user.id).first()
-    if not db_file:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+    db_file = await asyncio.to_thread(get_owned_file, db, file_id, current_user.id)
 
-    # In a real implementation, this would stream from S3/MinIO
-    # For now, we'll stream a placeholder encrypted content
-    async def fake_encrypted_content_generator():
-        # This is a placeholder for the actual encrypted file content
-        yield b"fake-encrypted-content"
+    file_path = storage.get_local_path(file_id, current_user.id)
+    if file_path is not None:
+        try:
+            stat_result = await asyncio.to_thread(os.stat, file_path)
+        except FileNotFoundError:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+        if range_header is None:
+            # Whole files on local disk are sent by the kernel via sendfile()
+            return FileResponse(
+                path=file_path,
+                media_type=db_file.mime_type,
+                stat_result=stat_result,
+                headers={"Accept-Ranges": "bytes"},
+            )
+        size = stat_result.st_size
+    else:
+        # Stored size, not size_bytes: the stored object is the encrypted payload
+        try:
+            size = await storage.get_file_size(file_id, current_user.id)
+        except FileNotFoundError:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
 
-    return StreamingResponse(fake_encrypted_content_generator(), media_type=db_file.mime_type)
+    headers = {"Accept-Ranges": "bytes"}
+    byte_range = parse_byte_range(range_header, size)
+    if byte_range is None:
+        start, end = 0, None
+        status_code = status.HTTP_200_OK
+        headers["Content-Length"] = str(size)
+    else:
+        start, end = byte_range
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(end - start + 1)
+
+    # Pass the storage's native async iterator straight through (a sync
+    # generator would be iterated in the thread pool)
+    return StreamingResponse(
+        storage.download_file(file_id, current_user.id, start=start, end=end, size=size),
+        status_code=status_code,
+        media_type=db_file.mime_type,
+        headers=headers,
+    )
 
 
 @router.post("/upload/{file_id}/complete")
-def mark_upload_as_complete(
+async def mark_upload_as_complete(
     file_id: uuid.UUID,
+    upload: schemas.FileUploadComplete,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
+    storage: StorageBackend = Depends(get_storage),
 ):
-    db_file = db.query(models.FileMetadata).filter_by(id=file_id, owner_id=current_user.id).first()
-    if not db_file:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+    db_file = await asyncio.to_thread(get_owned_file, db, file_id, current_user.id)
+    if db_file.upload_status == "complete":
+        # Retried request: the upload was already finalized
+        return await asyncio.to_thread(db.get, models.FileMetadata, file_id)
+    if db_file.upload_status != "pending":
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Upload is not in progress")
 
-    db_file.upload_status = "complete"
-    db.commit()
-    db.refresh(db_file)
+    try:
+        await storage.finalize_upload(
+            file_id, upload.total_chunks, current_user.id, upload_id=db_file.multipart_upload_id
+        )
+    except UploadNotInProgressError:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Upload is not in progress")
+
+    db_file = await asyncio.to_thread(mark_file_complete, db, file_id, current_user.id)
+    _upload_cache.pop((file_id, current_user.id), None)
 
     # TODO: Trigger antivirus scan task here
 
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 import uuid
 from datetime import datetime
 
@@ -11,6 +11,9 @@ class FileMetadataBase(BaseModel):
 class FileMetadataCreate(FileMetadataBase):
     pass
 
+class FileUploadComplete(BaseModel):
+    total_chunks: int = Field(ge=0, le=10000)
+
 class FileMetadata(FileMetadataBase):
     id: uuid.UUID
     owner_id: uuid.UUID
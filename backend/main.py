@@ -1,22 +1,40 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from auth.router import router as auth_router
+from auth.security import pwd_context
+from core.config import settings
 from files.router import router as files_router
+from storage import get_storage_backend
+from tasks.audit import start_audit_flusher, stop_audit_flusher
 
-app = FastAPI()
 
-# CORS configuration
-origins = [
-    "http://localhost:3000",
-    "http://localhost:3001", # In case the port is already in use
-]
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Force passlib to load the argon2 backend before the first login
+    pwd_context.hash("warmup")
+    # Build the shared storage backend once instead of on the first request
+    get_storage_backend()
+    # Audit entries from endpoints are batched into bulk INSERTs in-process
+    audit_flusher = start_audit_flusher()
+    try:
+        yield
+    finally:
+        # Requests are done by now, so every queued audit entry gets written
+        await stop_audit_flusher(audit_flusher)
 
+
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
+
+# CORS configuration (CORS_* settings). Origins and methods are frozensets, so
+# the middleware's per-request membership checks are O(1).
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=settings.cors_origins_list,
+    allow_credentials=settings.cors_allow_credentials,
+    allow_methods=settings.cors_methods_list,
+    allow_headers=settings.cors_headers_list,
 )
 
 app.include_router(auth_router, prefix="/auth", tags=["auth"])
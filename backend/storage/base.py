@@ -3,20 +3,66 @@ Base storage backend interface
 All storage implementations must inherit from this class
 """
 from abc import ABC, abstractmethod
-from typing import AsyncIterator, Optional
+from functools import lru_cache
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Dict, List, Optional, Set, Tuple
 import uuid
 
+from core.config import settings
+
+# Read size used when streaming stored files back to clients
+STREAM_CHUNK_SIZE = settings.stream_chunk_size
+
+# S3 API error codes meaning the object doesn't exist (HEAD responses only carry the status)
+NOT_FOUND_CODES = frozenset({'404', 'NoSuchKey', 'NotFound'})
+
+
+@lru_cache(maxsize=8192)
+def _user_prefix(user_id: uuid.UUID) -> str:
+    """Key prefix for a user; cached because str(UUID) dominates key building"""
+    return f"users/{user_id}/"
+
+
+def byte_range_header(start: int, end: Optional[int]) -> Optional[str]:
+    """HTTP Range header value for an inclusive byte range (None for the whole object)"""
+    if start == 0 and end is None:
+        return None
+    return f"bytes={start}-{'' if end is None else end}"
+
+
+class UploadNotInProgressError(Exception):
+    """Raised when a chunk or completion targets an upload that is no longer open"""
+
 
 class StorageBackend(ABC):
     """Abstract base class for storage backends"""
 
+    async def init_upload(
+        self,
+        file_id: uuid.UUID,
+        user_id: uuid.UUID
+    ) -> Optional[str]:
+        """
+        Prepare storage for a new chunked upload.
+
+        Args:
+            file_id: Unique identifier for the file
+            user_id: User who owns the file
+
+        Returns:
+            Backend upload identifier, or None if the backend doesn't need one
+        """
+        return None
+
     @abstractmethod
     async def upload_chunk(
         self,
         file_id: uuid.UUID,
         chunk_number: int,
-        chunk_data: bytes,
-        user_id: uuid.UUID
+        chunk: BinaryIO,
+        size: int,
+        user_id: uuid.UUID,
+        upload_id: Optional[str] = None
     ) -> str:
         """
         Upload a file chunk to storage.
@@ -24,8 +70,10 @@ class StorageBackend(ABC):
         Args:
             file_id: Unique identifier for the file
             chunk_number: Sequential chunk number (0-indexed)
-            chunk_data: Raw chunk bytes
+            chunk: Binary file object positioned at the start of the chunk
+            size: Chunk size in bytes
             user_id: User who owns the file
+            upload_id: Identifier returned by init_upload, if any
 
         Returns:
             Storage path or key for the chunk
@@ -37,7 +85,8 @@ class StorageBackend(ABC):
         self,
         file_id: uuid.UUID,
         total_chunks: int,
-        user_id: uuid.UUID
+        user_id: uuid.UUID,
+        upload_id: Optional[str] = None
     ) -> str:
         """
         Finalize multi-part upload by combining chunks.
@@ -46,17 +95,40 @@ class StorageBackend(ABC):
             file_id: Unique identifier for the file
             total_chunks: Total number of chunks
             user_id: User who owns the file
+            upload_id: Identifier returned by init_upload, if any
 
         Returns:
             Final storage path or key
         """
         pass
 
+    async def abort_upload(
+        self,
+        file_id: uuid.UUID,
+        user_id: uuid.UUID,
+        upload_id: Optional[str] = None
+    ) -> bool:
+        """
+        Discard the stored parts of an upload that will never be finalized.
+
+        Args:
+            file_id: Unique identifier for the file
+            user_id: User who owns the file
+            upload_id: Identifier returned by init_upload, if any
+
+        Returns:
+            True if nothing is left behind
+        """
+        return True
+
     @abstractmethod
     async def download_file(
         self,
         file_id: uuid.UUID,
-        user_id: uuid.UUID
+        user_id: uuid.UUID,
+        start: int = 0,
+        end: Optional[int] = None,
+        size: Optional[int] = None
     ) -> AsyncIterator[bytes]:
         """
         Download a file as async stream.
@@ -64,6 +136,9 @@ class StorageBackend(ABC):
         Args:
             file_id: Unique identifier for the file
             user_id: User who owns the file
+            start: First byte offset to return
+            end: Last byte offset to return (inclusive), None for end of file
+            size: Stored size in bytes, if the caller already knows it
 
         Yields:
             Chunks of file data
@@ -88,6 +163,25 @@ class StorageBackend(ABC):
         """
         pass
 
+    async def delete_files(
+        self,
+        files: List[Tuple[uuid.UUID, uuid.UUID]]
+    ) -> Set[uuid.UUID]:
+        """
+        Delete many files; backends with a batch delete API override this.
+
+        Args:
+            files: (file_id, user_id) pairs
+
+        Returns:
+            IDs of the files that were deleted successfully
+        """
+        deleted = set()
+        for file_id, user_id in files:
+            if await self.delete_file(file_id, user_id):
+                deleted.add(file_id)
+        return deleted
+
     @abstractmethod
     async def get_file_size(
         self,
@@ -106,6 +200,30 @@ class StorageBackend(ABC):
         """
         pass
 
+    async def get_many_sizes(
+        self,
+        user_id: uuid.UUID,
+        file_ids: List[uuid.UUID]
+    ) -> Dict[uuid.UUID, int]:
+        """
+        Get the sizes of many files owned by one user; object stores override
+        this with a prefix listing instead of one HEAD per file.
+
+        Args:
+            user_id: User who owns the files
+            file_ids: File identifiers to look up
+
+        Returns:
+            Size in bytes for each file that exists (missing files are omitted)
+        """
+        sizes = {}
+        for file_id in file_ids:
+            try:
+                sizes[file_id] = await self.get_file_size(file_id, user_id)
+            except Exception:
+                continue
+        return sizes
+
     @abstractmethod
     async def file_exists(
         self,
@@ -144,12 +262,25 @@ class StorageBackend(ABC):
         """
         pass
 
+    def get_local_path(self, file_id: uuid.UUID, user_id: uuid.UUID) -> Optional[Path]:
+        """
+        Get the filesystem path of a stored file, if the backend keeps files on local disk.
+
+        Args:
+            file_id: Unique identifier for the file
+            user_id: User who owns the file
+
+        Returns:
+            Path to the file, or None for remote backends
+        """
+        return None
+
     def _get_file_key(self, file_id: uuid.UUID, user_id: uuid.UUID) -> str:
         """
         Generate storage key for a file.
         Format: users/{user_id}/files/{file_id}
         """
-        return f"users/{user_id}/files/{file_id}"
+        return f"{_user_prefix(user_id)}files/{file_id}"
 
     def _get_chunk_key(
         self,
@@ -161,4 +292,4 @@ class StorageBackend(ABC):
         Generate storage key for a file chunk.
         Format: users/{user_id}/chunks/{file_id}/{chunk_number}
         """
-        return f"users/{user_id}/chunks/{file_id}/{chunk_number:06d}"
+        return f"{_user_prefix(user_id)}chunks/{file_id}/{chunk_number:06d}"
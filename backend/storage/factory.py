@@ -2,6 +2,8 @@
 Storage backend factory
 Returns the appropriate storage backend based on configuration
 """
+from functools import lru_cache
+
 from .base import StorageBackend
 from .s3_storage import S3Storage
 from .minio_storage import MinIOStorage
@@ -9,32 +11,26 @@ from .local_storage import LocalStorage
 from core.config import settings
 
 
-# Singleton instance
-_storage_backend: StorageBackend = None
-
-
+@lru_cache(maxsize=1)
 def get_storage_backend() -> StorageBackend:
     """
     Get the configured storage backend (singleton).
+    Use get_storage_backend.cache_clear() to reset it (e.g. in tests).
 
     Returns:
         StorageBackend instance based on settings.storage_backend
     """
-    global _storage_backend
-
-    if _storage_backend is not None:
-        return _storage_backend
-
     backend_type = settings.storage_backend.lower()
 
     if backend_type == "s3":
-        _storage_backend = S3Storage()
+        storage_backend = S3Storage()
         print("Using S3 storage backend")
     elif backend_type == "minio":
-        _storage_backend = MinIOStorage()
+        storage_backend = MinIOStorage()
+        storage_backend._ensure_bucket()
         print("Using MinIO storage backend")
     elif backend_type == "local":
-        _storage_backend = LocalStorage()
+        storage_backend = LocalStorage()
         print("Using local filesystem storage backend")
     else:
         raise ValueError(
@@ -42,10 +38,16 @@ def get_storage_backend() -> StorageBackend:
             f"Valid options are: s3, minio, local"
         )
 
-    return _storage_backend
+    return storage_backend
 
 
-def reset_storage_backend():
-    """Reset the singleton instance (useful for testing)"""
-    global _storage_backend
-    _storage_backend = None
+async def get_storage() -> StorageBackend:
+    """
+    FastAPI dependency for the storage backend. It is async so FastAPI calls it
+    on the event loop instead of in the thread pool; the backend itself is
+    built once at startup.
+
+    Returns:
+        The cached StorageBackend instance
+    """
+    return get_storage_backend()
@@ -4,14 +4,117 @@ Useful for development and small deployments
 """
 import uuid
 import os
+import sys
 import shutil
+import asyncio
+import mmap
+import contextlib
 import aiofiles
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import AsyncIterator
+from typing import AsyncIterator, BinaryIO, List, Optional, Set, Tuple
 
-from .base import StorageBackend
+from .base import StorageBackend, UploadNotInProgressError, STREAM_CHUNK_SIZE
 from core.config import settings
 
+# sendfile() into a regular file is only supported on Linux
+_USE_SENDFILE = sys.platform.startswith("linux") and hasattr(os, "sendfile")
+# Elsewhere, chunks are mmapped and appended with one writev() per group
+_USE_WRITEV = not _USE_SENDFILE and hasattr(os, "writev")
+APPEND_GROUP_SIZE = 16
+DELETE_CONCURRENCY = 16
+
+# Disk writes get their own threads so large uploads don't starve the default
+# executor that endpoints use for database calls
+_write_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="local-storage-write")
+
+
+def _write_file(path: Path, src: BinaryIO) -> None:
+    """Copy src to path in 1 MiB blocks with raw syscalls (open, write until done, close)"""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        while True:
+            view = memoryview(src.read(1 << 20))
+            if not view:
+                break
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+    finally:
+        os.close(fd)
+
+
+# Directories already created by this process, so writes skip the mkdir syscalls
+_ensured_dirs: Set[Path] = set()
+
+
+def _ensure_dir(path: Path) -> None:
+    """Create a directory once per process"""
+    if path not in _ensured_dirs:
+        path.mkdir(parents=True, exist_ok=True)
+        _ensured_dirs.add(path)
+
+
+def _append_file(src, dst) -> None:
+    """Append the contents of src to dst, copying in-kernel when possible"""
+    if _USE_SENDFILE:
+        offset = 0
+        remaining = os.fstat(src.fileno()).st_size
+        while remaining > 0:
+            sent = os.sendfile(dst.fileno(), src.fileno(), offset, remaining)
+            if sent == 0:
+                break
+            offset += sent
+            remaining -= sent
+    else:
+        shutil.copyfileobj(src, dst, length=1 << 20)
+
+
+def _writev_all(fd: int, bufs) -> None:
+    """writev() the buffers, finishing a short write with plain write() calls"""
+    written = os.writev(fd, bufs)
+    for buf in bufs:
+        if written >= len(buf):
+            written -= len(buf)
+            continue
+        view = memoryview(buf)[written:]
+        written = 0
+        while view:
+            view = view[os.write(fd, view):]
+
+
+def _append_files(paths, dst) -> None:
+    """Append a group of files to dst with as few syscalls as the platform allows"""
+    if not _USE_WRITEV:
+        for path in paths:
+            with open(path, 'rb') as src:
+                _append_file(src, dst)
+        return
+
+    with contextlib.ExitStack() as stack:
+        bufs = []
+        for path in paths:
+            src = stack.enter_context(open(path, 'rb'))
+            # mmap() rejects empty files; they contribute nothing anyway
+            if os.fstat(src.fileno()).st_size:
+                bufs.append(stack.enter_context(
+                    mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ)
+                ))
+        if bufs:
+            _writev_all(dst.fileno(), bufs)
+
+
+def _unlink(path: Path) -> bool:
+    """Remove a file; a missing file counts as removed, like an object store delete"""
+    try:
+        os.unlink(path)
+        return True
+    except FileNotFoundError:
+        return True
+    except OSError as e:
+        print(f"Error deleting file: {e}")
+        return False
+
 
 class LocalStorage(StorageBackend):
     """Local filesystem storage backend"""
@@ -24,37 +127,54 @@ class LocalStorage(StorageBackend):
     def _ensure_directory(self):
         """Create storage directory if it doesn't exist"""
         self.storage_path.mkdir(parents=True, exist_ok=True)
-        print(f"Local storage initialized at: {self.storage_path}")
 
-    def _get_file_path(self, file_id: uuid.UUID, user_id: uuid.UUID) -> Path:
-        """Get local file path"""
+    def _get_file_path(self, file_id: uuid.UUID, user_id: uuid.UUID, create: bool = False) -> Path:
+        """Get local file path, creating its directory only when about to write"""
         user_dir = self.storage_path / "users" / str(user_id) / "files"
-        user_dir.mkdir(parents=True, exist_ok=True)
+        if create:
+            _ensure_dir(user_dir)
         return user_dir / str(file_id)
 
+    def get_local_path(self, file_id: uuid.UUID, user_id: uuid.UUID) -> Optional[Path]:
+        """Get local file path (lets the API serve it with sendfile)"""
+        return self._get_file_path(file_id, user_id)
+
     def _get_chunk_path(
         self,
         file_id: uuid.UUID,
         chunk_number: int,
-        user_id: uuid.UUID
+        user_id: uuid.UUID,
+        create: bool = False
     ) -> Path:
-        """Get local chunk path"""
+        """Get local chunk path, creating its directory only when about to write"""
         chunks_dir = self.storage_path / "users" / str(user_id) / "chunks" / str(file_id)
-        chunks_dir.mkdir(parents=True, exist_ok=True)
+        if create:
+            _ensure_dir(chunks_dir)
         return chunks_dir / f"{chunk_number:06d}"
 
     async def upload_chunk(
         self,
         file_id: uuid.UUID,
         chunk_number: int,
-        chunk_data: bytes,
-        user_id: uuid.UUID
+        chunk: BinaryIO,
+        size: int,
+        user_id: uuid.UUID,
+        upload_id: Optional[str] = None
     ) -> str:
         """Save chunk to local filesystem"""
-        chunk_path = self._get_chunk_path(file_id, chunk_number, user_id)
+        final_path = self._get_file_path(file_id, user_id)
 
-        async with aiofiles.open(chunk_path, 'wb') as f:
-            await f.write(chunk_data)
+        def _write_chunk() -> Path:
+            # A final file means the upload was already finalized
+            if final_path.exists():
+                raise UploadNotInProgressError(f"Upload already finalized for file {file_id}")
+            chunk_path = self._get_chunk_path(file_id, chunk_number, user_id, create=True)
+            _write_file(chunk_path, chunk)
+            return chunk_path
+
+        # One thread hop for the whole check/open/write/close sequence
+        loop = asyncio.get_running_loop()
+        chunk_path = await loop.run_in_executor(_write_executor, _write_chunk)
 
         return str(chunk_path)
 
@@ -62,25 +182,35 @@ class LocalStorage(StorageBackend):
         self,
         file_id: uuid.UUID,
         total_chunks: int,
-        user_id: uuid.UUID
+        user_id: uuid.UUID,
+        upload_id: Optional[str] = None
     ) -> str:
         """Combine chunks into final file"""
-        final_path = self._get_file_path(file_id, user_id)
+        final_path = self._get_file_path(file_id, user_id, create=True)
         chunks_dir = self._get_chunk_path(file_id, 0, user_id).parent
+        chunk_paths = [
+            self._get_chunk_path(file_id, chunk_num, user_id)
+            for chunk_num in range(total_chunks)
+        ]
 
-        # Combine all chunks
-        async with aiofiles.open(final_path, 'wb') as final_file:
-            for chunk_num in range(total_chunks):
-                chunk_path = self._get_chunk_path(file_id, chunk_num, user_id)
-
+        def _finalize():
+            # Verify every chunk before consuming any of them
+            for chunk_num, chunk_path in enumerate(chunk_paths):
                 if not chunk_path.exists():
                     raise Exception(f"Chunk {chunk_num} not found")
 
-                async with aiofiles.open(chunk_path, 'rb') as chunk_file:
-                    chunk_data = await chunk_file.read()
-                    await final_file.write(chunk_data)
+            with open(final_path, 'wb') as final_file:
+                for start in range(0, len(chunk_paths), APPEND_GROUP_SIZE):
+                    group = chunk_paths[start:start + APPEND_GROUP_SIZE]
+                    _append_files(group, final_file)
+                    for chunk_path in group:
+                        chunk_path.unlink()
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(_write_executor, _finalize)
 
         # Clean up chunks directory
+        _ensured_dirs.discard(chunks_dir)
         try:
             shutil.rmtree(chunks_dir)
         except Exception as e:
@@ -88,24 +218,51 @@ class LocalStorage(StorageBackend):
 
         return str(final_path)
 
+    async def abort_upload(
+        self,
+        file_id: uuid.UUID,
+        user_id: uuid.UUID,
+        upload_id: Optional[str] = None
+    ) -> bool:
+        """Remove the chunks directory"""
+        chunks_dir = self._get_chunk_path(file_id, 0, user_id).parent
+        _ensured_dirs.discard(chunks_dir)
+
+        try:
+            await asyncio.to_thread(shutil.rmtree, chunks_dir)
+            return True
+        except FileNotFoundError:
+            return True
+        except OSError as e:
+            print(f"Error removing chunks: {e}")
+            return False
+
     async def download_file(
         self,
         file_id: uuid.UUID,
-        user_id: uuid.UUID
+        user_id: uuid.UUID,
+        start: int = 0,
+        end: Optional[int] = None,
+        size: Optional[int] = None
     ) -> AsyncIterator[bytes]:
-        """Download file as async stream"""
+        """Download file (or an inclusive byte range of it) as async stream"""
         file_path = self._get_file_path(file_id, user_id)
 
         if not file_path.exists():
             raise Exception(f"File not found: {file_id}")
 
-        chunk_size = 64 * 1024  # 64KB chunks
+        remaining = None if end is None else end - start + 1
 
         async with aiofiles.open(file_path, 'rb') as f:
-            while True:
-                chunk = await f.read(chunk_size)
+            if start:
+                await f.seek(start)
+            while remaining is None or remaining > 0:
+                read_size = STREAM_CHUNK_SIZE if remaining is None else min(STREAM_CHUNK_SIZE, remaining)
+                chunk = await f.read(read_size)
                 if not chunk:
                     break
+                if remaining is not None:
+                    remaining -= len(chunk)
                 yield chunk
 
     async def delete_file(
@@ -125,6 +282,28 @@ class LocalStorage(StorageBackend):
             print(f"Error deleting file: {e}")
             return False
 
+    async def delete_files(
+        self,
+        files: List[Tuple[uuid.UUID, uuid.UUID]]
+    ) -> Set[uuid.UUID]:
+        """Delete many files, unlinking them in parallel on a thread pool"""
+        paths = {file_id: self._get_file_path(file_id, user_id) for file_id, user_id in files}
+
+        def _delete_all() -> Set[uuid.UUID]:
+            deleted = set()
+            with ThreadPoolExecutor(
+                max_workers=DELETE_CONCURRENCY, thread_name_prefix="local-storage-delete"
+            ) as pool:
+                futures = {pool.submit(_unlink, path): file_id for file_id, path in paths.items()}
+                for future in as_completed(futures):
+                    if future.result():
+                        deleted.add(futures[future])
+            return deleted
+
+        if not paths:
+            return set()
+        return await asyncio.to_thread(_delete_all)
+
     async def get_file_size(
         self,
         file_id: uuid.UUID,
@@ -133,10 +312,10 @@ class LocalStorage(StorageBackend):
         """Get file size"""
         file_path = self._get_file_path(file_id, user_id)
 
-        if not file_path.exists():
-            raise Exception(f"File not found: {file_id}")
-
-        return file_path.stat().st_size
+        try:
+            return file_path.stat().st_size
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File not found: {file_id}")
 
     async def file_exists(
         self,
@@ -155,7 +334,7 @@ class LocalStorage(StorageBackend):
     ) -> bool:
         """Copy file for versioning"""
         source_path = self._get_file_path(source_file_id, user_id)
-        dest_path = self._get_file_path(dest_file_id, user_id)
+        dest_path = self._get_file_path(dest_file_id, user_id, create=True)
 
         try:
             if not source_path.exists():
@@ -1,136 +1,257 @@
 """
 MinIO storage backend implementation
+Object operations go through aiobotocore (S3 API over aiohttp) so they run
+natively on the event loop; the MinIO SDK is only used for bucket admin.
 """
 import uuid
 import asyncio
-from typing import AsyncIterator, Optional
+import weakref
+from typing import AsyncIterator, BinaryIO, Dict, List, Optional, Set, Tuple
+from aiobotocore.config import AioConfig
+from aiobotocore.session import get_session
+from botocore.exceptions import ClientError
+import urllib3
+from urllib3.util import Retry, Timeout
 from minio import Minio
 from minio.error import S3Error
-import io
 
-from .base import StorageBackend
+from .base import (
+    StorageBackend,
+    NOT_FOUND_CODES,
+    UploadNotInProgressError,
+    STREAM_CHUNK_SIZE,
+    _user_prefix,
+    byte_range_header,
+)
 from core.config import settings
 
+DELETE_BATCH_SIZE = 1000
+
 
 class MinIOStorage(StorageBackend):
     """MinIO storage backend"""
 
     def __init__(self):
-        """Initialize MinIO client"""
-        self.client = Minio(
+        """Initialize MinIO clients"""
+        self.admin_client = Minio(
             endpoint=settings.minio_endpoint,
             access_key=settings.minio_access_key,
             secret_key=settings.minio_secret_key,
-            secure=settings.minio_secure
+            secure=settings.minio_secure,
+            http_client=urllib3.PoolManager(
+                num_pools=10,
+                maxsize=settings.minio_max_pool_connections,
+                retries=Retry(total=3, backoff_factor=0.2),
+                timeout=Timeout(connect=3, read=30),
+            ),
         )
         self.bucket = settings.minio_bucket
-        self._ensure_bucket()
+
+        scheme = "https" if settings.minio_secure else "http"
+        self._session = get_session()
+        self._client_kwargs = {
+            'endpoint_url': f"{scheme}://{settings.minio_endpoint}",
+            'aws_access_key_id': settings.minio_access_key,
+            'aws_secret_access_key': settings.minio_secret_key,
+            'region_name': 'us-east-1',
+            # Large keep-alive pool so concurrent chunk transfers reuse
+            # connections instead of paying TCP/TLS setup per request
+            'config': AioConfig(
+                s3={'addressing_style': 'path'},
+                max_pool_connections=settings.minio_max_pool_connections,
+                connect_timeout=3,
+                read_timeout=30,
+                retries={'max_attempts': 3, 'mode': 'standard'},
+                tcp_keepalive=True,
+            ),
+        }
+        # aiobotocore clients are bound to the event loop that created them
+        self._clients = weakref.WeakKeyDictionary()
 
     def _ensure_bucket(self):
-        """Create bucket if it doesn't exist"""
+        """Create bucket if it doesn't exist (called once by get_storage_backend)"""
         try:
-            if not self.client.bucket_exists(self.bucket):
-                self.client.make_bucket(self.bucket)
+            if not self.admin_client.bucket_exists(self.bucket):
+                self.admin_client.make_bucket(self.bucket)
                 print(f"Created MinIO bucket: {self.bucket}")
         except S3Error as e:
             print(f"Error ensuring bucket exists: {e}")
             raise
 
+    async def _get_client(self):
+        """Get the S3 client for the running event loop, creating it on first use"""
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            new_client = await self._session.create_client('s3', **self._client_kwargs).__aenter__()
+            client = self._clients.setdefault(loop, new_client)
+            if client is not new_client:
+                await new_client.close()
+        return client
+
+    async def init_upload(
+        self,
+        file_id: uuid.UUID,
+        user_id: uuid.UUID
+    ) -> Optional[str]:
+        """Start a native multipart upload on the final object key"""
+        final_key = self._get_file_key(file_id, user_id)
+        client = await self._get_client()
+
+        try:
+            response = await client.create_multipart_upload(Bucket=self.bucket, Key=final_key)
+        except ClientError as e:
+            raise Exception(f"Failed to start multipart upload: {e}")
+
+        return response['UploadId']
+
     async def upload_chunk(
         self,
         file_id: uuid.UUID,
         chunk_number: int,
-        chunk_data: bytes,
-        user_id: uuid.UUID
+        chunk: BinaryIO,
+        size: int,
+        user_id: uuid.UUID,
+        upload_id: Optional[str] = None
     ) -> str:
-        """Upload a chunk to MinIO"""
-        chunk_key = self._get_chunk_key(file_id, chunk_number, user_id)
-
-        # MinIO client is sync, run in thread pool
-        def _upload():
-            data = io.BytesIO(chunk_data)
-            self.client.put_object(
-                bucket_name=self.bucket,
-                object_name=chunk_key,
-                data=data,
-                length=len(chunk_data),
+        """Upload a chunk as a part of the file's multipart upload"""
+        if upload_id is None:
+            raise UploadNotInProgressError(f"No multipart upload in progress for file {file_id}")
+
+        final_key = self._get_file_key(file_id, user_id)
+        client = await self._get_client()
+        # The upload is a sync (possibly disk-spooled) file; read it off the
+        # event loop so aiohttp doesn't do blocking reads while sending
+        body = await asyncio.to_thread(chunk.read, size)
+
+        try:
+            await client.upload_part(
+                Bucket=self.bucket,
+                Key=final_key,
+                UploadId=upload_id,
+                PartNumber=chunk_number + 1,
+                Body=body,
+                ContentLength=size,
             )
-            return chunk_key
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'NoSuchUpload':
+                raise UploadNotInProgressError(f"No multipart upload in progress for file {file_id}")
+            raise Exception(f"Failed to upload chunk {chunk_number}: {e}")
 
-        return await asyncio.to_thread(_upload)
+        return final_key
 
     async def finalize_upload(
         self,
         file_id: uuid.UUID,
         total_chunks: int,
-        user_id: uuid.UUID
+        user_id: uuid.UUID,
+        upload_id: Optional[str] = None
     ) -> str:
-        """Combine chunks into final file"""
+        """Complete the multipart upload; MinIO assembles the parts server-side"""
+        if upload_id is None:
+            raise UploadNotInProgressError(f"No multipart upload in progress for file {file_id}")
+
         final_key = self._get_file_key(file_id, user_id)
+        client = await self._get_client()
+
+        if total_chunks == 0:
+            # A multipart upload can't be completed without parts
+            await client.abort_multipart_upload(Bucket=self.bucket, Key=final_key, UploadId=upload_id)
+            await client.put_object(Bucket=self.bucket, Key=final_key, Body=b'')
+            return final_key
 
-        def _finalize():
-            # Read all chunks and combine
-            combined_data = io.BytesIO()
-
-            for chunk_num in range(total_chunks):
-                chunk_key = self._get_chunk_key(file_id, chunk_num, user_id)
-                try:
-                    response = self.client.get_object(self.bucket, chunk_key)
-                    combined_data.write(response.read())
-                    response.close()
-                    response.release_conn()
-                except S3Error as e:
-                    raise Exception(f"Failed to read chunk {chunk_num}: {e}")
-
-            # Upload combined file
-            combined_data.seek(0)
-            size = combined_data.getbuffer().nbytes
-            self.client.put_object(
-                bucket_name=self.bucket,
-                object_name=final_key,
-                data=combined_data,
-                length=size,
+        try:
+            # ETags come from the server's part listing, so nothing has to be
+            # persisted per chunk while the upload is in flight
+            parts = await self._list_parts(client, final_key, upload_id)
+            missing = set(range(1, total_chunks + 1)) - {part['PartNumber'] for part in parts}
+            if missing or len(parts) != total_chunks:
+                raise Exception(f"Upload incomplete: expected {total_chunks} chunks, got {len(parts)}")
+
+            await client.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=final_key,
+                UploadId=upload_id,
+                MultipartUpload={'Parts': parts},
             )
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'NoSuchUpload':
+                raise UploadNotInProgressError(f"No multipart upload in progress for file {file_id}")
+            raise Exception(f"Failed to complete upload: {e}")
 
-            # Clean up chunks
-            for chunk_num in range(total_chunks):
-                chunk_key = self._get_chunk_key(file_id, chunk_num, user_id)
-                try:
-                    self.client.remove_object(self.bucket, chunk_key)
-                except S3Error:
-                    pass  # Ignore errors during cleanup
+        return final_key
 
-            return final_key
+    async def abort_upload(
+        self,
+        file_id: uuid.UUID,
+        user_id: uuid.UUID,
+        upload_id: Optional[str] = None
+    ) -> bool:
+        """Abort the multipart upload so MinIO frees its stored parts"""
+        if upload_id is None:
+            return True
+
+        final_key = self._get_file_key(file_id, user_id)
+        client = await self._get_client()
+
+        try:
+            await client.abort_multipart_upload(Bucket=self.bucket, Key=final_key, UploadId=upload_id)
+            return True
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'NoSuchUpload':
+                return True
+            print(f"Error aborting upload: {e}")
+            return False
 
-        return await asyncio.to_thread(_finalize)
+    async def _list_parts(self, client, final_key: str, upload_id: str) -> List[Dict]:
+        """List uploaded parts (paginated, 1000 per page)"""
+        parts = []
+        marker = 0
+        while True:
+            response = await client.list_parts(
+                Bucket=self.bucket,
+                Key=final_key,
+                UploadId=upload_id,
+                PartNumberMarker=marker,
+            )
+            parts.extend(
+                {'PartNumber': part['PartNumber'], 'ETag': part['ETag']}
+                for part in response.get('Parts', [])
+            )
+            if not response.get('IsTruncated'):
+                return parts
+            marker = response['NextPartNumberMarker']
 
     async def download_file(
         self,
         file_id: uuid.UUID,
-        user_id: uuid.UUID
+        user_id: uuid.UUID,
+        start: int = 0,
+        end: Optional[int] = None,
+        size: Optional[int] = None
     ) -> AsyncIterator[bytes]:
-        """Download file as async stream"""
+        """Download file (or an inclusive byte range of it) as async stream"""
         file_key = self._get_file_key(file_id, user_id)
+        client = await self._get_client()
 
-        def _get_object():
-            try:
-                return self.client.get_object(self.bucket, file_key)
-            except S3Error as e:
-                raise Exception(f"File not found: {e}")
+        kwargs = {'Bucket': self.bucket, 'Key': file_key}
+        range_header = byte_range_header(start, end)
+        if range_header:
+            kwargs['Range'] = range_header
 
-        response = await asyncio.to_thread(_get_object)
+        try:
+            response = await client.get_object(**kwargs)
+        except ClientError as e:
+            raise Exception(f"File not found: {e}")
+
+        body = response['Body']
 
         try:
             # Stream in chunks
-            chunk_size = 64 * 1024  # 64KB chunks
-            while True:
-                chunk = await asyncio.to_thread(response.read, chunk_size)
-                if not chunk:
-                    break
+            async for chunk in body.iter_chunks(STREAM_CHUNK_SIZE):
                 yield chunk
         finally:
-            response.close()
-            response.release_conn()
+            body.close()
 
     async def delete_file(
         self,
@@ -139,16 +260,40 @@ class MinIOStorage(StorageBackend):
     ) -> bool:
         """Delete file from MinIO"""
         file_key = self._get_file_key(file_id, user_id)
+        client = await self._get_client()
+
+        try:
+            await client.delete_object(Bucket=self.bucket, Key=file_key)
+            return True
+        except ClientError as e:
+            print(f"Error deleting file: {e}")
+            return False
+
+    async def delete_files(
+        self,
+        files: List[Tuple[uuid.UUID, uuid.UUID]]
+    ) -> Set[uuid.UUID]:
+        """Delete many files with batched delete_objects requests (1000 keys each)"""
+        keys = {self._get_file_key(file_id, user_id): file_id for file_id, user_id in files}
+        key_list = list(keys)
+        client = await self._get_client()
+        failed = set()
 
-        def _delete():
+        for start in range(0, len(key_list), DELETE_BATCH_SIZE):
+            batch = key_list[start:start + DELETE_BATCH_SIZE]
             try:
-                self.client.remove_object(self.bucket, file_key)
-                return True
-            except S3Error as e:
-                print(f"Error deleting file: {e}")
-                return False
+                response = await client.delete_objects(
+                    Bucket=self.bucket,
+                    Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True},
+                )
+                for error in response.get('Errors', []):
+                    failed.add(error.get('Key'))
+                    print(f"Error deleting file: {error.get('Key')}: {error.get('Message')}")
+            except ClientError as e:
+                failed.update(batch)
+                print(f"Error deleting files: {e}")
 
-        return await asyncio.to_thread(_delete)
+        return {file_id for key, file_id in keys.items() if key not in failed}
 
     async def get_file_size(
         self,
@@ -157,15 +302,43 @@ class MinIOStorage(StorageBackend):
     ) -> int:
         """Get file size"""
         file_key = self._get_file_key(file_id, user_id)
+        client = await self._get_client()
 
-        def _get_size():
-            try:
-                stat = self.client.stat_object(self.bucket, file_key)
-                return stat.size
-            except S3Error as e:
-                raise Exception(f"File not found: {e}")
+        try:
+            response = await client.head_object(Bucket=self.bucket, Key=file_key)
+            return response['ContentLength']
+        except ClientError as e:
+            if e.response['Error']['Code'] in NOT_FOUND_CODES:
+                raise FileNotFoundError(f"File not found: {file_id}")
+            raise Exception(f"Failed to get file size: {e}")
 
-        return await asyncio.to_thread(_get_size)
+    async def get_many_sizes(
+        self,
+        user_id: uuid.UUID,
+        file_ids: List[uuid.UUID]
+    ) -> Dict[uuid.UUID, int]:
+        """Get file sizes from a list_objects_v2 scan of the user's files (1000 keys per request)"""
+        prefix = f"{_user_prefix(user_id)}files/"
+        wanted = {str(file_id): file_id for file_id in file_ids}
+        sizes = {}
+        if not wanted:
+            return sizes
+
+        client = await self._get_client()
+        paginator = client.get_paginator('list_objects_v2')
+
+        try:
+            async for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+                for obj in page.get('Contents', []):
+                    file_id = wanted.get(obj['Key'][len(prefix):])
+                    if file_id is not None:
+                        sizes[file_id] = obj['Size']
+                if len(sizes) == len(wanted):
+                    break
+        except ClientError as e:
+            raise Exception(f"Failed to list files: {e}")
+
+        return sizes
 
     async def file_exists(
         self,
@@ -174,15 +347,13 @@ class MinIOStorage(StorageBackend):
     ) -> bool:
         """Check if file exists"""
         file_key = self._get_file_key(file_id, user_id)
+        client = await self._get_client()
 
-        def _exists():
-            try:
-                self.client.stat_object(self.bucket, file_key)
-                return True
-            except S3Error:
-                return False
-
-        return await asyncio.to_thread(_exists)
+        try:
+            await client.head_object(Bucket=self.bucket, Key=file_key)
+            return True
+        except ClientError:
+            return False
 
     async def copy_file(
         self,
@@ -193,18 +364,15 @@ class MinIOStorage(StorageBackend):
         """Copy file for versioning"""
         source_key = self._get_file_key(source_file_id, user_id)
         dest_key = self._get_file_key(dest_file_id, user_id)
+        client = await self._get_client()
 
-        def _copy():
-            try:
-                from minio.commonconfig import CopySource
-                self.client.copy_object(
-                    bucket_name=self.bucket,
-                    object_name=dest_key,
-                    source=CopySource(self.bucket, source_key)
-                )
-                return True
-            except S3Error as e:
-                print(f"Error copying file: {e}")
-                return False
-
-        return await asyncio.to_thread(_copy)
+        try:
+            await client.copy_object(
+                Bucket=self.bucket,
+                CopySource={'Bucket': self.bucket, 'Key': source_key},
+                Key=dest_key
+            )
+            return True
+        except ClientError as e:
+            print(f"Error copying file: {e}")
+            return False
@@ -1,24 +1,61 @@
 """
 AWS S3 storage backend implementation
+Object operations go through aiobotocore (S3 API over aiohttp) so they run
+natively on the event loop; boto3 is only used for bucket admin.
 """
 import uuid
 import asyncio
-from typing import AsyncIterator, Optional
+import weakref
+from collections import deque
+from itertools import islice
+from typing import AsyncIterator, Awaitable, BinaryIO, Dict, Iterable, List, Optional, Set, Tuple
 import boto3
+from aiobotocore.config import AioConfig
+from aiobotocore.session import get_session
 from botocore.exceptions import ClientError
-import io
 
-from .base import StorageBackend
+from .base import (
+    StorageBackend,
+    NOT_FOUND_CODES,
+    UploadNotInProgressError,
+    STREAM_CHUNK_SIZE,
+    _user_prefix,
+    byte_range_header,
+)
 from core.config import settings
 
+# Flexible checksum for chunk uploads, so botocore skips its pure-Python
+# Content-MD5 pass over the body (CRC32C would need the awscrt extra)
+CHECKSUM_ALGORITHM = 'CRC32'
+# Concurrent UploadPartCopy requests when combining chunks
+COPY_CONCURRENCY = 16
+DELETE_BATCH_SIZE = 1000
+# Downloads larger than one part are fetched with parallel ranged GETs
+DOWNLOAD_PART_SIZE = 8 * 1024 * 1024
+DOWNLOAD_CONCURRENCY = 8
+# S3 minimum size for every part of a multipart upload except the last
+MIN_PART_SIZE = 5 * 1024 * 1024
+# Client-side combine re-uploads in 16 MiB parts, at most 4 in flight
+COMBINE_PART_SIZE = 16 * 1024 * 1024
+COMBINE_CONCURRENCY = 4
+
+
+async def _gather_or_cancel(aws: Iterable[Awaitable]) -> List:
+    """gather() that cancels the remaining tasks as soon as one fails"""
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
 
 class S3Storage(StorageBackend):
     """AWS S3 storage backend"""
 
     def __init__(self):
-        """Initialize S3 client"""
-        session = boto3.session.Session()
-
+        """Initialize S3 clients"""
         s3_config = {
             'aws_access_key_id': settings.aws_access_key_id,
             'aws_secret_access_key': settings.aws_secret_access_key,
@@ -28,20 +65,37 @@ class S3Storage(StorageBackend):
         if settings.s3_endpoint_url:
             s3_config['endpoint_url'] = settings.s3_endpoint_url
 
-        self.client = session.client('s3', **s3_config)
+        self.admin_client = boto3.session.Session().client('s3', **s3_config)
         self.bucket = settings.s3_bucket
+
+        self._session = get_session()
+        self._client_kwargs = {
+            **s3_config,
+            # Keep-alive pool sized for concurrent chunk transfers, with
+            # adaptive retries that back off client-side when S3 throttles
+            'config': AioConfig(
+                max_pool_connections=settings.s3_max_pool_connections,
+                tcp_keepalive=True,
+                retries={'max_attempts': 10, 'mode': 'adaptive'},
+                s3={'use_accelerate_endpoint': settings.s3_accelerate},
+            ),
+        }
+        # aiobotocore clients (and asyncio semaphores) are bound to the event
+        # loop that created them
+        self._clients = weakref.WeakKeyDictionary()
+        self._semaphores = weakref.WeakKeyDictionary()
         self._ensure_bucket()
 
     def _ensure_bucket(self):
         """Create bucket if it doesn't exist"""
         try:
-            self.client.head_bucket(Bucket=self.bucket)
+            self.admin_client.head_bucket(Bucket=self.bucket)
         except ClientError as e:
             error_code = e.response['Error']['Code']
             if error_code == '404':
                 # Bucket doesn't exist, create it
                 try:
-                    self.client.create_bucket(Bucket=self.bucket)
+                    self.admin_client.create_bucket(Bucket=self.bucket)
                     print(f"Created S3 bucket: {self.bucket}")
                 except ClientError as create_error:
                     print(f"Error creating bucket: {create_error}")
@@ -49,96 +103,352 @@ class S3Storage(StorageBackend):
             else:
                 raise
 
+    async def _get_client(self):
+        """Get the S3 client for the running event loop, creating it on first use"""
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            new_client = await self._session.create_client('s3', **self._client_kwargs).__aenter__()
+            client = self._clients.setdefault(loop, new_client)
+            if client is not new_client:
+                await new_client.close()
+        return client
+
+    def _inflight(self) -> asyncio.Semaphore:
+        """
+        Semaphore capping concurrent S3 requests on the running event loop.
+        Bursts queue here instead of fanning out past S3's request rate and
+        turning 503 SlowDown responses into retry storms.
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores.setdefault(loop, asyncio.Semaphore(settings.s3_max_inflight))
+        return semaphore
+
     async def upload_chunk(
         self,
         file_id: uuid.UUID,
         chunk_number: int,
-        chunk_data: bytes,
-        user_id: uuid.UUID
+        chunk: BinaryIO,
+        size: int,
+        user_id: uuid.UUID,
+        upload_id: Optional[str] = None
     ) -> str:
-        """Upload a chunk to S3"""
+        """Upload a chunk to S3, refusing it once the upload has been finalized"""
         chunk_key = self._get_chunk_key(file_id, chunk_number, user_id)
+        client = await self._get_client()
 
-        def _upload():
-            self.client.put_object(
-                Bucket=self.bucket,
-                Key=chunk_key,
-                Body=chunk_data
-            )
-            return chunk_key
+        # Chunks are separate objects, so a late chunk would otherwise be
+        # stored after finalize and never cleaned up
+        try:
+            async with self._inflight():
+                await client.head_object(Bucket=self.bucket, Key=self._get_file_key(file_id, user_id))
+        except ClientError as e:
+            if e.response['Error']['Code'] not in NOT_FOUND_CODES:
+                raise Exception(f"Failed to upload chunk {chunk_number}: {e}")
+        else:
+            raise UploadNotInProgressError(f"Upload already finalized for file {file_id}")
 
-        return await asyncio.to_thread(_upload)
+        # The upload is a sync (possibly disk-spooled) file; read it off the
+        # event loop so aiohttp doesn't do blocking reads while sending
+        body = await asyncio.to_thread(chunk.read, size)
+
+        try:
+            async with self._inflight():
+                await client.put_object(
+                    Bucket=self.bucket,
+                    Key=chunk_key,
+                    Body=body,
+                    ContentLength=size,
+                    ChecksumAlgorithm=CHECKSUM_ALGORITHM,
+                )
+        except ClientError as e:
+            raise Exception(f"Failed to upload chunk {chunk_number}: {e}")
+
+        return chunk_key
 
     async def finalize_upload(
         self,
         file_id: uuid.UUID,
         total_chunks: int,
-        user_id: uuid.UUID
+        user_id: uuid.UUID,
+        upload_id: Optional[str] = None
     ) -> str:
         """Combine chunks into final file"""
         final_key = self._get_file_key(file_id, user_id)
+        client = await self._get_client()
 
-        def _finalize():
-            # Read all chunks and combine
-            combined_data = io.BytesIO()
+        chunk_keys = [
+            self._get_chunk_key(file_id, chunk_num, user_id)
+            for chunk_num in range(total_chunks)
+        ]
 
-            for chunk_num in range(total_chunks):
-                chunk_key = self._get_chunk_key(file_id, chunk_num, user_id)
-                try:
-                    response = self.client.get_object(Bucket=self.bucket, Key=chunk_key)
-                    combined_data.write(response['Body'].read())
-                except ClientError as e:
-                    raise Exception(f"Failed to read chunk {chunk_num}: {e}")
-
-            # Upload combined file
-            combined_data.seek(0)
-            self.client.put_object(
-                Bucket=self.bucket,
-                Key=final_key,
-                Body=combined_data.getvalue()
-            )
+        try:
+            sizes = await self._list_chunks(client, file_id, user_id)
+        except ClientError as e:
+            raise Exception(f"Failed to list chunks: {e}")
+        for chunk_num, chunk_key in enumerate(chunk_keys):
+            if chunk_key not in sizes:
+                raise Exception(f"Chunk {chunk_num} not found")
 
-            # Clean up chunks
-            for chunk_num in range(total_chunks):
-                chunk_key = self._get_chunk_key(file_id, chunk_num, user_id)
-                try:
-                    self.client.delete_object(Bucket=self.bucket, Key=chunk_key)
-                except ClientError:
-                    pass  # Ignore errors during cleanup
+        try:
+            # Chunks under the 5 MiB part minimum can't be copied as parts,
+            # so pick the path before any copy is made
+            if all(sizes[chunk_key] >= MIN_PART_SIZE for chunk_key in chunk_keys[:-1]):
+                await self._combine_server_side(client, final_key, chunk_keys)
+            else:
+                await self._combine_client_side(client, final_key, chunk_keys)
+        except ClientError as e:
+            raise Exception(f"Failed to combine chunks: {e}")
+
+        # Clean up chunks in batch requests
+        await self._delete_keys(client, chunk_keys)
+
+        return final_key
+
+    async def abort_upload(
+        self,
+        file_id: uuid.UUID,
+        user_id: uuid.UUID,
+        upload_id: Optional[str] = None
+    ) -> bool:
+        """Delete the chunks uploaded so far"""
+        client = await self._get_client()
+
+        try:
+            keys = list(await self._list_chunks(client, file_id, user_id))
+        except ClientError as e:
+            print(f"Error listing chunks: {e}")
+            return False
 
-            return final_key
+        return not await self._delete_keys(client, keys)
 
-        return await asyncio.to_thread(_finalize)
+    async def _list_chunks(self, client, file_id: uuid.UUID, user_id: uuid.UUID) -> Dict[str, int]:
+        """Size of every stored chunk of a file, by key (1000 keys per list request)"""
+        prefix = f"{_user_prefix(user_id)}chunks/{file_id}/"
+        paginator = client.get_paginator('list_objects_v2')
+        sizes = {}
+
+        async with self._inflight():
+            async for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+                for obj in page.get('Contents', []):
+                    sizes[obj['Key']] = obj['Size']
+        return sizes
+
+    async def _abort_multipart(self, client, final_key: str, upload_id: str) -> None:
+        """Abort a multipart upload after a failure, without masking the original error"""
+        try:
+            await client.abort_multipart_upload(Bucket=self.bucket, Key=final_key, UploadId=upload_id)
+        except Exception as e:
+            print(f"Warning: Failed to abort multipart upload {upload_id}: {e}")
+
+    async def _combine_server_side(self, client, final_key: str, chunk_keys: List[str]) -> None:
+        """Concatenate chunks with a multipart upload of UploadPartCopy parts (no data leaves S3)"""
+        if not chunk_keys:
+            async with self._inflight():
+                await client.put_object(Bucket=self.bucket, Key=final_key, Body=b'')
+            return
+
+        async with self._inflight():
+            upload_id = (await client.create_multipart_upload(Bucket=self.bucket, Key=final_key))['UploadId']
+        semaphore = asyncio.Semaphore(COPY_CONCURRENCY)
+
+        async def _copy_part(part_number: int, chunk_key: str) -> Dict:
+            async with semaphore, self._inflight():
+                response = await client.upload_part_copy(
+                    Bucket=self.bucket,
+                    Key=final_key,
+                    UploadId=upload_id,
+                    PartNumber=part_number,
+                    CopySource={'Bucket': self.bucket, 'Key': chunk_key},
+                )
+            return {'PartNumber': part_number, 'ETag': response['CopyPartResult']['ETag']}
+
+        try:
+            parts = await _gather_or_cancel(
+                _copy_part(part_number, chunk_key)
+                for part_number, chunk_key in enumerate(chunk_keys, start=1)
+            )
+
+            async with self._inflight():
+                await client.complete_multipart_upload(
+                    Bucket=self.bucket,
+                    Key=final_key,
+                    UploadId=upload_id,
+                    MultipartUpload={'Parts': parts},
+                )
+        except BaseException:
+            await self._abort_multipart(client, final_key, upload_id)
+            raise
+
+    async def _combine_client_side(self, client, final_key: str, chunk_keys: List[str]) -> None:
+        """Read the chunks back and re-upload them as large parts (memory bounded by COMBINE_CONCURRENCY parts)"""
+        async with self._inflight():
+            upload_id = (await client.create_multipart_upload(Bucket=self.bucket, Key=final_key))['UploadId']
+        semaphore = asyncio.Semaphore(COMBINE_CONCURRENCY)
+        tasks = []
+
+        async def _upload_part(part_number: int, data: bytes) -> Dict:
+            try:
+                async with self._inflight():
+                    response = await client.upload_part(
+                        Bucket=self.bucket,
+                        Key=final_key,
+                        UploadId=upload_id,
+                        PartNumber=part_number,
+                        Body=data,
+                    )
+                return {'PartNumber': part_number, 'ETag': response['ETag']}
+            finally:
+                semaphore.release()
+
+        async def _start_part(data: bytes) -> None:
+            await semaphore.acquire()
+            tasks.append(asyncio.create_task(_upload_part(len(tasks) + 1, data)))
+
+        try:
+            buffer = bytearray()
+            for chunk_key in chunk_keys:
+                async with self._inflight():
+                    response = await client.get_object(Bucket=self.bucket, Key=chunk_key)
+                    body = response['Body']
+                    try:
+                        buffer += await body.read()
+                    finally:
+                        body.close()
+
+                if len(buffer) >= COMBINE_PART_SIZE:
+                    await _start_part(bytes(buffer))
+                    buffer = bytearray()
+
+            if buffer or not tasks:
+                await _start_part(bytes(buffer))
+
+            parts = await _gather_or_cancel(tasks)
+
+            async with self._inflight():
+                await client.complete_multipart_upload(
+                    Bucket=self.bucket,
+                    Key=final_key,
+                    UploadId=upload_id,
+                    MultipartUpload={'Parts': parts},
+                )
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await self._abort_multipart(client, final_key, upload_id)
+            raise
+
+    async def _delete_keys(self, client, keys: List[str]) -> Set[str]:
+        """
+        Delete objects in batches of up to 1000 keys per request.
+        Returns the keys that could not be deleted.
+        """
+        failed = set()
+        for start in range(0, len(keys), DELETE_BATCH_SIZE):
+            batch = keys[start:start + DELETE_BATCH_SIZE]
+            try:
+                async with self._inflight():
+                    response = await client.delete_objects(
+                        Bucket=self.bucket,
+                        Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True},
+                    )
+                for error in response.get('Errors', []):
+                    failed.add(error.get('Key'))
+                    print(f"Warning: Failed to delete {error.get('Key')}: {error.get('Message')}")
+            except ClientError as e:
+                failed.update(batch)
+                print(f"Warning: Failed to delete objects: {e}")
+        return failed
 
     async def download_file(
         self,
         file_id: uuid.UUID,
-        user_id: uuid.UUID
+        user_id: uuid.UUID,
+        start: int = 0,
+        end: Optional[int] = None,
+        size: Optional[int] = None
     ) -> AsyncIterator[bytes]:
-        """Download file as async stream"""
+        """Download file (or an inclusive byte range of it) as async stream"""
         file_key = self._get_file_key(file_id, user_id)
+        client = await self._get_client()
 
-        def _get_object():
+        if size is None:
             try:
-                return self.client.get_object(Bucket=self.bucket, Key=file_key)
+                async with self._inflight():
+                    size = (await client.head_object(Bucket=self.bucket, Key=file_key))['ContentLength']
             except ClientError as e:
                 raise Exception(f"File not found: {e}")
+        last = size - 1 if end is None else min(end, size - 1)
+
+        if last - start + 1 > DOWNLOAD_PART_SIZE:
+            async for part in self._download_parts(client, file_key, start, last):
+                yield part
+            return
 
-        response = await asyncio.to_thread(_get_object)
+        kwargs = {'Bucket': self.bucket, 'Key': file_key}
+        range_header = byte_range_header(start, end)
+        if range_header:
+            kwargs['Range'] = range_header
+
+        # The slot covers the request only; streaming the body to a slow client
+        # shouldn't hold back other S3 traffic
+        try:
+            async with self._inflight():
+                response = await client.get_object(**kwargs)
+        except ClientError as e:
+            raise Exception(f"File not found: {e}")
 
-        # Stream in chunks
-        chunk_size = 64 * 1024  # 64KB chunks
         body = response['Body']
 
         try:
-            while True:
-                chunk = await asyncio.to_thread(body.read, chunk_size)
-                if not chunk:
-                    break
+            # Stream in chunks
+            async for chunk in body.iter_chunks(STREAM_CHUNK_SIZE):
                 yield chunk
         finally:
             body.close()
 
+    async def _download_parts(self, client, file_key: str, start: int, last: int) -> AsyncIterator[bytes]:
+        """
+        Fetch [start, last] with parallel ranged GETs and yield the parts in order.
+        At most DOWNLOAD_CONCURRENCY parts are in flight (or buffered) at once.
+        """
+        ranges = iter([
+            (first, min(first + DOWNLOAD_PART_SIZE - 1, last))
+            for first in range(start, last + 1, DOWNLOAD_PART_SIZE)
+        ])
+
+        async def _get_range(first: int, last: int) -> bytes:
+            async with self._inflight():
+                try:
+                    response = await client.get_object(
+                        Bucket=self.bucket, Key=file_key, Range=f"bytes={first}-{last}"
+                    )
+                except ClientError as e:
+                    raise Exception(f"Failed to read bytes {first}-{last}: {e}")
+                body = response['Body']
+                try:
+                    return await body.read()
+                finally:
+                    body.close()
+
+        pending = deque(
+            asyncio.create_task(_get_range(*byte_range))
+            for byte_range in islice(ranges, DOWNLOAD_CONCURRENCY)
+        )
+
+        try:
+            while pending:
+                part = await pending.popleft()
+                byte_range = next(ranges, None)
+                if byte_range is not None:
+                    pending.append(asyncio.create_task(_get_range(*byte_range)))
+                yield part
+        finally:
+            for task in pending:
+                task.cancel()
+
     async def delete_file(
         self,
         file_id: uuid.UUID,
@@ -146,16 +456,26 @@ class S3Storage(StorageBackend):
     ) -> bool:
         """Delete file from S3"""
         file_key = self._get_file_key(file_id, user_id)
+        client = await self._get_client()
 
-        def _delete():
-            try:
-                self.client.delete_object(Bucket=self.bucket, Key=file_key)
-                return True
-            except ClientError as e:
-                print(f"Error deleting file: {e}")
-                return False
+        try:
+            async with self._inflight():
+                await client.delete_object(Bucket=self.bucket, Key=file_key)
+            return True
+        except ClientError as e:
+            print(f"Error deleting file: {e}")
+            return False
+
+    async def delete_files(
+        self,
+        files: List[Tuple[uuid.UUID, uuid.UUID]]
+    ) -> Set[uuid.UUID]:
+        """Delete many files with batched delete_objects requests"""
+        keys = {self._get_file_key(file_id, user_id): file_id for file_id, user_id in files}
+        client = await self._get_client()
 
-        return await asyncio.to_thread(_delete)
+        failed = await self._delete_keys(client, list(keys))
+        return {file_id for key, file_id in keys.items() if key not in failed}
 
     async def get_file_size(
         self,
@@ -164,15 +484,46 @@ class S3Storage(StorageBackend):
     ) -> int:
         """Get file size"""
         file_key = self._get_file_key(file_id, user_id)
+        client = await self._get_client()
 
-        def _get_size():
-            try:
-                response = self.client.head_object(Bucket=self.bucket, Key=file_key)
-                return response['ContentLength']
-            except ClientError as e:
-                raise Exception(f"File not found: {e}")
+        try:
+            async with self._inflight():
+                response = await client.head_object(Bucket=self.bucket, Key=file_key)
+            return response['ContentLength']
+        except ClientError as e:
+            if e.response['Error']['Code'] in NOT_FOUND_CODES:
+                raise FileNotFoundError(f"File not found: {file_id}")
+            raise Exception(f"Failed to get file size: {e}")
+
+    async def get_many_sizes(
+        self,
+        user_id: uuid.UUID,
+        file_ids: List[uuid.UUID]
+    ) -> Dict[uuid.UUID, int]:
+        """Get file sizes from a list_objects_v2 scan of the user's files (1000 keys per request)"""
+        prefix = f"{_user_prefix(user_id)}files/"
+        wanted = {str(file_id): file_id for file_id in file_ids}
+        sizes = {}
+        if not wanted:
+            return sizes
+
+        client = await self._get_client()
+        paginator = client.get_paginator('list_objects_v2')
 
-        return await asyncio.to_thread(_get_size)
+        try:
+            # Pages are fetched one after another, so the scan needs one slot
+            async with self._inflight():
+                async for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+                    for obj in page.get('Contents', []):
+                        file_id = wanted.get(obj['Key'][len(prefix):])
+                        if file_id is not None:
+                            sizes[file_id] = obj['Size']
+                    if len(sizes) == len(wanted):
+                        break
+        except ClientError as e:
+            raise Exception(f"Failed to list files: {e}")
+
+        return sizes
 
     async def file_exists(
         self,
@@ -181,15 +532,14 @@ class S3Storage(StorageBackend):
     ) -> bool:
         """Check if file exists"""
         file_key = self._get_file_key(file_id, user_id)
+        client = await self._get_client()
 
-        def _exists():
-            try:
-                self.client.head_object(Bucket=self.bucket, Key=file_key)
-                return True
-            except ClientError:
-                return False
-
-        return await asyncio.to_thread(_exists)
+        try:
+            async with self._inflight():
+                await client.head_object(Bucket=self.bucket, Key=file_key)
+            return True
+        except ClientError:
+            return False
 
     async def copy_file(
         self,
@@ -200,21 +550,16 @@ class S3Storage(StorageBackend):
         """Copy file for versioning"""
         source_key = self._get_file_key(source_file_id, user_id)
         dest_key = self._get_file_key(dest_file_id, user_id)
+        client = await self._get_client()
 
-        def _copy():
-            try:
-                copy_source = {
-                    'Bucket': self.bucket,
-                    'Key': source_key
-                }
-                self.client.copy_object(
+        try:
+            async with self._inflight():
+                await client.copy_object(
                     Bucket=self.bucket,
-                    CopySource=copy_source,
+                    CopySource={'Bucket': self.bucket, 'Key': source_key},
                     Key=dest_key
                 )
-                return True
-            except ClientError as e:
-                print(f"Error copying file: {e}")
-                return False
-
-        return await asyncio.to_thread(_copy)
+            return True
+        except ClientError as e:
+            print(f"Error copying file: {e}")
+            return False
@@ -2,11 +2,16 @@
 Celery tasks for FileGuard
 """
 from .antivirus import scan_file_task
-from .notifications import send_email_notification_task
+from .notifications import send_email_notification_task, send_email_batch_task
 from .cleanup import cleanup_old_files_task
+from .audit import write_audit, bulk_audit, enqueue_audit
 
 __all__ = [
     "scan_file_task",
     "send_email_notification_task",
+    "send_email_batch_task",
     "cleanup_old_files_task",
+    "write_audit",
+    "bulk_audit",
+    "enqueue_audit",
 ]
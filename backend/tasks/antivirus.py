@@ -1,12 +1,15 @@
 """
 Antivirus scanning tasks using ClamAV
 """
+import io
 import uuid
 import logging
-from typing import Dict, Any
+from typing import AsyncIterator, BinaryIO, Dict, Any, Optional
 import clamd
+from sqlalchemy import update
+from sqlalchemy.orm import Session
 
-from celery_app import celery_app
+from celery_app import celery_app, run_async
 from core.config import settings
 from core.database import SessionLocal
 from core.models import FileMetadata, AuditLog
@@ -15,6 +18,48 @@ from storage import get_storage_backend
 logger = logging.getLogger(__name__)
 
 
+class StorageReadError(Exception):
+    """Reading the file from storage failed mid-scan (retryable, unlike a scan error)"""
+
+
+async def _next_chunk(chunks: AsyncIterator[bytes]) -> Optional[bytes]:
+    try:
+        return await chunks.__anext__()
+    except StopAsyncIteration:
+        return None
+
+
+class _ChunkStream(io.RawIOBase):
+    """
+    Read-only file object over an async chunk iterator.
+    Chunks are pulled on demand, so only one is held in memory at a time.
+    """
+
+    def __init__(self, chunks: AsyncIterator[bytes]):
+        self._chunks = chunks
+        self._pending = memoryview(b'')
+        self._done = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._pending and not self._done:
+            try:
+                chunk = run_async(_next_chunk(self._chunks))
+            except Exception as e:
+                raise StorageReadError(str(e)) from e
+            if chunk is None:
+                self._done = True
+            else:
+                self._pending = memoryview(chunk)
+
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
 class ClamAVScanner:
     """ClamAV scanner wrapper"""
 
@@ -37,15 +82,16 @@ class ClamAVScanner:
             logger.error(f"ClamAV ping failed: {e}")
             return False
 
-    def scan_stream(self, data: bytes) -> Dict[str, Any]:
+    def scan_stream(self, stream: BinaryIO) -> Dict[str, Any]:
         """
         Scan data stream for viruses.
+        The stream is read incrementally and sent as INSTREAM frames.
 
         Returns:
             Dict with 'status' (clean/infected) and optional 'virus_name'
         """
         try:
-            result = self.client.instream(data)
+            result = self.client.instream(stream)
 
             if result and 'stream' in result:
                 scan_result = result['stream']
@@ -60,12 +106,52 @@ class ClamAVScanner:
             else:
                 return {'status': 'error', 'message': 'Unexpected scan result format'}
 
+        except StorageReadError:
+            # Not a scanner problem: let the task fail and retry
+            raise
         except Exception as e:
             logger.error(f"ClamAV scan error: {e}")
             return {'status': 'error', 'message': str(e)}
 
 
-@celery_app.task(name="tasks.scan_file", bind=True, max_retries=3)
+# One scanner per worker process. clamd opens a socket per command, so the
+# saving is the PING round trip: it only runs when the scanner is (re)created.
+_scanner: Optional[ClamAVScanner] = None
+
+
+def _get_scanner() -> ClamAVScanner:
+    """Get the worker's ClamAV scanner, creating and pinging it on first use"""
+    global _scanner
+
+    if _scanner is None:
+        scanner = ClamAVScanner()
+        if not scanner.ping():
+            raise Exception("ClamAV is not responding")
+        _scanner = scanner
+    return _scanner
+
+
+def _reset_scanner() -> None:
+    """Drop the cached scanner after a failure"""
+    global _scanner
+    _scanner = None
+
+
+def _set_scan_status(db: Session, file_id: uuid.UUID, scan_status: str, scan_result: Optional[str] = None) -> bool:
+    """UPDATE the file's scan status by id without loading the row; False if no such file"""
+    values = {'av_scan_status': scan_status}
+    if scan_result is not None:
+        values['av_scan_result'] = scan_result
+    stmt = (
+        update(FileMetadata)
+        .where(FileMetadata.id == file_id)
+        .values(**values)
+        .returning(FileMetadata.id)
+    )
+    return db.execute(stmt).first() is not None
+
+
+@celery_app.task(name="tasks.scan_file", bind=True, max_retries=3, ignore_result=False)
 def scan_file_task(self, file_id: str, user_id: str) -> Dict[str, Any]:
     """
     Scan a file for viruses using ClamAV.
@@ -83,23 +169,11 @@ def scan_file_task(self, file_id: str, user_id: str) -> Dict[str, Any]:
     db = SessionLocal()
 
     try:
-        # Get file metadata
-        file_meta = db.query(FileMetadata).filter(
-            FileMetadata.id == file_uuid
-        ).first()
-
-        if not file_meta:
-            raise Exception(f"File not found: {file_id}")
-
-        # Update status to scanning
-        file_meta.av_scan_status = "scanning"
-        db.commit()
-
         # Check if ClamAV is enabled
         if not settings.clamav_enabled:
             logger.warning("ClamAV is disabled, skipping scan")
-            file_meta.av_scan_status = "skipped"
-            file_meta.av_scan_result = "ClamAV disabled"
+            if not _set_scan_status(db, file_uuid, "skipped", "ClamAV disabled"):
+                raise Exception(f"File not found: {file_id}")
             db.commit()
             return {
                 'file_id': file_id,
@@ -107,48 +181,51 @@ def scan_file_task(self, file_id: str, user_id: str) -> Dict[str, Any]:
                 'message': 'ClamAV is disabled'
             }
 
-        # Initialize scanner
-        scanner = ClamAVScanner()
+        storage = get_storage_backend()
 
-        # Check ClamAV availability
-        if not scanner.ping():
-            raise Exception("ClamAV is not responding")
+        # clamd rejects streams over its StreamMaxLength, so don't download
+        # and send a file that can't be scanned anyway
+        size = run_async(storage.get_file_size(file_uuid, user_uuid))
+        if size > settings.clamav_max_stream_bytes:
+            logger.warning(f"File {file_id} is too large to scan ({size} bytes)")
+            message = f"File exceeds the {settings.clamav_max_stream_bytes} byte scan limit"
+            if not _set_scan_status(db, file_uuid, "too_large", message):
+                raise Exception(f"File not found: {file_id}")
+            db.commit()
+            return {
+                'file_id': file_id,
+                'status': 'too_large',
+                'message': message
+            }
 
-        # Download file from storage
-        storage = get_storage_backend()
+        # Update status to scanning (one UPDATE, doubles as the existence check)
+        if not _set_scan_status(db, file_uuid, "scanning"):
+            raise Exception(f"File not found: {file_id}")
+        db.commit()
 
-        # Read file in chunks and scan
-        file_data = b''
-        async_gen = storage.download_file(file_uuid, user_uuid)
+        # Reuse the worker's scanner (pinged once when created)
+        scanner = _get_scanner()
 
-        # Convert async generator to sync (Celery limitation)
-        import asyncio
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+        # Stream the file from storage straight into ClamAV (Celery tasks are sync,
+        # so the async download is driven on the worker's event loop)
+        async_gen = storage.download_file(file_uuid, user_uuid, size=size)
 
         try:
-            async def read_file():
-                data = b''
-                async for chunk in async_gen:
-                    data += chunk
-                return data
-
-            file_data = loop.run_until_complete(read_file())
+            scan_result = scanner.scan_stream(_ChunkStream(async_gen))
         finally:
-            loop.close()
+            run_async(async_gen.aclose())
 
-        # Scan the file
-        scan_result = scanner.scan_stream(file_data)
+        if scan_result['status'] == 'error':
+            # Re-create and re-ping the scanner on the next task
+            _reset_scanner()
 
-        # Update database with results
+        # Update database with results (status and audit entry in one commit)
         if scan_result['status'] == 'clean':
-            file_meta.av_scan_status = 'clean'
-            file_meta.av_scan_result = 'No threats detected'
+            _set_scan_status(db, file_uuid, 'clean', 'No threats detected')
             status_message = 'File is clean'
 
         elif scan_result['status'] == 'infected':
-            file_meta.av_scan_status = 'infected'
-            file_meta.av_scan_result = f"Virus found: {scan_result.get('virus_name', 'Unknown')}"
+            _set_scan_status(db, file_uuid, 'infected', f"Virus found: {scan_result.get('virus_name', 'Unknown')}")
             status_message = f"Virus detected: {scan_result.get('virus_name')}"
 
             # Audit log for security event
@@ -164,8 +241,7 @@ def scan_file_task(self, file_id: str, user_id: str) -> Dict[str, Any]:
             db.add(audit)
 
         else:
-            file_meta.av_scan_status = 'error'
-            file_meta.av_scan_result = scan_result.get('message', 'Scan error')
+            _set_scan_status(db, file_uuid, 'error', scan_result.get('message', 'Scan error'))
             status_message = f"Scan error: {scan_result.get('message')}"
 
         db.commit()
@@ -184,13 +260,9 @@ def scan_file_task(self, file_id: str, user_id: str) -> Dict[str, Any]:
 
         # Update file status to error
         try:
-            file_meta = db.query(FileMetadata).filter(
-                FileMetadata.id == file_uuid
-            ).first()
-            if file_meta:
-                file_meta.av_scan_status = 'error'
-                file_meta.av_scan_result = f"Scan failed: {str(e)}"
-                db.commit()
+            db.rollback()
+            _set_scan_status(db, file_uuid, 'error', f"Scan failed: {str(e)}")
+            db.commit()
         except Exception:
             pass
 
@@ -0,0 +1,214 @@
+"""
+Audit logging tasks
+Audit rows are written off the request path so auth endpoints don't pay for
+an extra INSERT + commit on every call. Within a worker process, entries are
+buffered for a short window and flushed with a single bulk insert.
+The API process buffers its own entries in an asyncio queue the same way,
+so they don't need a broker round-trip each.
+"""
+import uuid
+import asyncio
+import logging
+import threading
+from typing import Optional, Dict, Any, List
+
+from celery.signals import worker_process_shutdown
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from celery_app import celery_app
+from core.database import SessionLocal
+from core.models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+AUDIT_BATCH_WINDOW_SECONDS = 0.1
+AUDIT_BATCH_MAX_SIZE = 500
+AUDIT_QUEUE_FLUSH_SECONDS = 1.0
+
+_buffer: List[Dict[str, Any]] = []
+_buffer_lock = threading.Lock()
+_flush_timer: Optional[threading.Timer] = None
+
+# Set while the API's audit flusher is running
+_audit_queue: Optional[asyncio.Queue] = None
+_audit_loop: Optional[asyncio.AbstractEventLoop] = None
+# Queued by stop_audit_flusher to end the flusher loop
+_STOP = object()
+
+
+def bulk_audit(db: Session, rows: List[Dict[str, Any]]) -> None:
+    """
+    Insert many audit log rows with one Core INSERT (no ORM instances).
+
+    Args:
+        db: Open session; the caller is responsible for committing
+        rows: Dicts with AuditLog column values (user_id, action, details)
+    """
+    if rows:
+        db.execute(insert(AuditLog), rows)
+
+
+def _write_rows(rows: List[Dict[str, Any]]) -> bool:
+    """Write audit rows in a single transaction; False if the write failed"""
+    db = SessionLocal()
+
+    try:
+        bulk_audit(db, rows)
+        db.commit()
+        return True
+    except Exception as e:
+        logger.error(f"Failed to write {len(rows)} audit log entries: {e}")
+        db.rollback()
+        return False
+    finally:
+        db.close()
+
+
+def _flush_buffer() -> None:
+    """Write all buffered audit rows"""
+    global _flush_timer
+
+    with _buffer_lock:
+        rows = list(_buffer)
+        _buffer.clear()
+        if _flush_timer is not None:
+            _flush_timer.cancel()
+            _flush_timer = None
+
+    if rows:
+        _write_rows(rows)
+
+
+@worker_process_shutdown.connect
+def _flush_on_shutdown(**kwargs) -> None:
+    _flush_buffer()
+
+
+@celery_app.task(name="tasks.write_audit", ignore_result=True, acks_late=False)
+def write_audit(user_id: Optional[str], action: str, details: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Queue an audit log entry for the next batched flush.
+
+    Args:
+        user_id: UUID of the acting user (None for system events)
+        action: Audit action name, e.g. 'user_login'
+        details: Optional JSON-serializable details
+    """
+    global _flush_timer
+
+    row = {
+        'user_id': uuid.UUID(user_id) if user_id else None,
+        'action': action,
+        'details': details,
+    }
+
+    with _buffer_lock:
+        _buffer.append(row)
+        flush_now = len(_buffer) >= AUDIT_BATCH_MAX_SIZE
+        if not flush_now and _flush_timer is None:
+            _flush_timer = threading.Timer(AUDIT_BATCH_WINDOW_SECONDS, _flush_buffer)
+            _flush_timer.daemon = True
+            _flush_timer.start()
+
+    if flush_now:
+        _flush_buffer()
+
+
+def enqueue_audit(user_id: Optional[uuid.UUID], action: str, details: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Record an audit entry without waiting on the database or the broker.
+    Safe to call from sync endpoints running in the thread pool; falls back to
+    the write_audit task when the API flusher isn't running.
+
+    Args:
+        user_id: UUID of the acting user (None for system events)
+        action: Audit action name, e.g. 'user_login'
+        details: Optional JSON-serializable details
+    """
+    loop, queue = _audit_loop, _audit_queue
+    if loop is None or queue is None:
+        write_audit.delay(str(user_id) if user_id else None, action, details)
+        return
+
+    row = {'user_id': user_id, 'action': action, 'details': details}
+    loop.call_soon_threadsafe(queue.put_nowait, row)
+
+
+def _hand_off_rows(rows: List[Dict[str, Any]]) -> None:
+    """Send rows the API couldn't write to the write_audit task instead of dropping them"""
+    for row in rows:
+        user_id = row['user_id']
+        try:
+            write_audit.delay(str(user_id) if user_id else None, row['action'], row['details'])
+        except Exception as e:
+            logger.error(f"Lost audit log entry {row['action']}: {e}")
+
+
+def _flush_rows(rows: List[Dict[str, Any]]) -> None:
+    """Write a batch from the API queue, falling back to the worker if the DB write fails"""
+    if not _write_rows(rows):
+        _hand_off_rows(rows)
+
+
+async def _run_audit_flusher(queue: asyncio.Queue) -> None:
+    """
+    Drain the queue, writing up to AUDIT_BATCH_MAX_SIZE rows per INSERT.
+    Returns once it takes the stop sentinel, after writing the rows it holds.
+    """
+    loop = asyncio.get_running_loop()
+
+    while True:
+        row = await queue.get()
+        if row is _STOP:
+            return
+
+        rows = [row]
+        stopping = False
+        deadline = loop.time() + AUDIT_QUEUE_FLUSH_SECONDS
+        while len(rows) < AUDIT_BATCH_MAX_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                row = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if row is _STOP:
+                stopping = True
+                break
+            rows.append(row)
+
+        await asyncio.to_thread(_flush_rows, rows)
+        if stopping:
+            return
+
+
+def start_audit_flusher() -> asyncio.Task:
+    """Start the API-side audit flusher on the running event loop"""
+    global _audit_queue, _audit_loop
+
+    _audit_queue = asyncio.Queue()
+    _audit_loop = asyncio.get_running_loop()
+    return asyncio.create_task(_run_audit_flusher(_audit_queue))
+
+
+async def stop_audit_flusher(task: asyncio.Task) -> None:
+    """Stop the flusher, letting it write the batch it holds and whatever is still queued"""
+    global _audit_queue, _audit_loop
+
+    queue = _audit_queue
+    _audit_queue = _audit_loop = None
+    if queue is None:
+        return
+
+    # Let puts already scheduled from other threads land ahead of the sentinel
+    await asyncio.sleep(0)
+    queue.put_nowait(_STOP)
+    await task
+
+    rows = []
+    while not queue.empty():
+        rows.append(queue.get_nowait())
+    if rows:
+        await asyncio.to_thread(_flush_rows, rows)
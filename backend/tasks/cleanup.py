@@ -1,11 +1,14 @@
 """
 Cleanup tasks for old files, temporary data, etc.
 """
+import asyncio
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, Any
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Set
 
-from celery_app import celery_app
+from sqlalchemy import delete, select
+
+from celery_app import celery_app, run_async
 from core.config import settings
 from core.database import SessionLocal
 from core.models import FileMetadata, AuditLog
@@ -13,6 +16,34 @@ from storage import get_storage_backend
 
 logger = logging.getLogger(__name__)
 
+# Upload aborts in flight at once (each is a request, or a thread for local storage)
+ABORT_CONCURRENCY = 16
+
+
+async def _purge_files(storage, files: List) -> Set:
+    """
+    Abort the unfinished uploads of the given rows, then delete their files.
+
+    Args:
+        storage: Storage backend
+        files: (id, owner_id, multipart_upload_id) rows
+
+    Returns:
+        IDs of the files whose storage was fully released
+    """
+    semaphore = asyncio.Semaphore(ABORT_CONCURRENCY)
+
+    async def _abort(file_id, owner_id, upload_id) -> bool:
+        async with semaphore:
+            return await storage.abort_upload(file_id, owner_id, upload_id=upload_id)
+
+    aborted = await asyncio.gather(*(_abort(*row) for row in files))
+    deleted_ids = await storage.delete_files([(file_id, owner_id) for file_id, owner_id, _ in files])
+    return {
+        file_id for (file_id, _, _), ok in zip(files, aborted)
+        if ok and file_id in deleted_ids
+    }
+
 
 @celery_app.task(name="tasks.cleanup_old_files")
 def cleanup_old_files_task(days: int = 90) -> Dict[str, Any]:
@@ -30,44 +61,39 @@ def cleanup_old_files_task(days: int = 90) -> Dict[str, Any]:
     failed_count = 0
 
     try:
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
+        cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
 
         # Find files marked for deletion or very old incomplete uploads
-        files_to_delete = db.query(FileMetadata).filter(
-            (FileMetadata.upload_status == "failed") |
-            ((FileMetadata.upload_status == "pending") & (FileMetadata.created_at < cutoff_date))
+        # (plain rows; no ORM objects or identity map needed)
+        files_to_delete = db.execute(
+            select(FileMetadata.id, FileMetadata.owner_id, FileMetadata.multipart_upload_id).where(
+                (FileMetadata.upload_status == "failed") |
+                ((FileMetadata.upload_status == "pending") & (FileMetadata.created_at < cutoff_date))
+            )
         ).all()
 
         storage = get_storage_backend()
 
-        for file in files_to_delete:
-            try:
-                # Delete from storage
-                import asyncio
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-
-                deleted = loop.run_until_complete(
-                    storage.delete_file(file.id, file.owner_id)
-                )
-                loop.close()
-
-                if deleted:
-                    # Delete from database
-                    db.delete(file)
-                    deleted_count += 1
-                    logger.info(f"Deleted file {file.id}")
-                else:
-                    failed_count += 1
-                    logger.warning(f"Failed to delete file {file.id} from storage")
-
-            except Exception as e:
-                failed_count += 1
-                logger.error(f"Error deleting file {file.id}: {e}")
-
-        db.commit()
-
-        # Log cleanup activity
+        # Abort unfinished uploads so their parts/chunks don't leak, then delete
+        # in one batch call (S3/MinIO send delete_objects with 1000 keys per
+        # request, local storage unlinks on a thread pool)
+        try:
+            deleted_ids = run_async(_purge_files(storage, files_to_delete))
+        except Exception as e:
+            logger.error(f"Error deleting files from storage: {e}")
+            deleted_ids = set()
+
+        for file_id, _, _ in files_to_delete:
+            if file_id not in deleted_ids:
+                logger.warning(f"Failed to delete file {file_id} from storage")
+        deleted_count = len(deleted_ids)
+        failed_count = len(files_to_delete) - deleted_count
+
+        # Delete the rows in one statement
+        if deleted_ids:
+            db.execute(delete(FileMetadata).where(FileMetadata.id.in_(list(deleted_ids))))
+
+        # Log cleanup activity in the same transaction as the row deletions
         audit = AuditLog(
             user_id=None,
             action="system_cleanup",
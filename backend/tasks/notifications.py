@@ -2,17 +2,49 @@
 Email notification tasks
 """
 import logging
-from typing import Dict, Any
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from typing import Dict, Any, List, Optional
+from email.message import EmailMessage
 import aiosmtplib
-import asyncio
 
-from celery_app import celery_app
+from celery_app import celery_app, run_async
 from core.config import settings
 
 logger = logging.getLogger(__name__)
 
+FROM_ADDRESS = f"{settings.smtp_from_name} <{settings.smtp_from_email}>"
+
+
+def _build_message(
+    to_email: str,
+    subject: str,
+    body_html: str,
+    body_text: Optional[str] = None
+) -> EmailMessage:
+    """Build an HTML email, with a plain text alternative when one is given"""
+    message = EmailMessage()
+    message['Subject'] = subject
+    message['From'] = FROM_ADDRESS
+    message['To'] = to_email
+
+    if body_text:
+        message.set_content(body_text)
+        message.add_alternative(body_html, subtype='html')
+    else:
+        message.set_content(body_html, subtype='html')
+
+    return message
+
+
+def _smtp_client() -> aiosmtplib.SMTP:
+    """SMTP client for the configured server (connects and logs in on enter)"""
+    return aiosmtplib.SMTP(
+        hostname=settings.smtp_host,
+        port=settings.smtp_port,
+        username=settings.smtp_user,
+        password=settings.smtp_password,
+        use_tls=True
+    )
+
 
 @celery_app.task(name="tasks.send_email_notification")
 def send_email_notification_task(
@@ -38,36 +70,11 @@ def send_email_notification_task(
         return {'status': 'skipped', 'message': 'SMTP disabled'}
 
     try:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-
         async def send_email():
-            # Create message
-            message = MIMEMultipart('alternative')
-            message['Subject'] = subject
-            message['From'] = f"{settings.smtp_from_name} <{settings.smtp_from_email}>"
-            message['To'] = to_email
-
-            # Add text parts
-            if body_text:
-                part1 = MIMEText(body_text, 'plain')
-                message.attach(part1)
-
-            part2 = MIMEText(body_html, 'html')
-            message.attach(part2)
-
-            # Send email
-            await aiosmtplib.send(
-                message,
-                hostname=settings.smtp_host,
-                port=settings.smtp_port,
-                username=settings.smtp_user,
-                password=settings.smtp_password,
-                use_tls=True
-            )
-
-        loop.run_until_complete(send_email())
-        loop.close()
+            async with _smtp_client() as smtp:
+                await smtp.send_message(_build_message(to_email, subject, body_html, body_text))
+
+        run_async(send_email())
 
         logger.info(f"Email sent to {to_email}: {subject}")
         return {'status': 'success', 'message': f'Email sent to {to_email}'}
@@ -75,3 +82,74 @@ def send_email_notification_task(
     except Exception as e:
         logger.error(f"Failed to send email to {to_email}: {e}")
         return {'status': 'error', 'message': str(e)}
+
+
+@celery_app.task(name="tasks.send_email_batch")
+def send_email_batch_task(emails: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Send many emails over a single SMTP connection.
+
+    Args:
+        emails: Dicts with to_email, subject, body_html and optional body_text
+
+    Returns:
+        Dict with send status and sent/failed counts
+    """
+    if not settings.smtp_enabled:
+        logger.warning("SMTP is disabled, emails not sent")
+        return {'status': 'skipped', 'message': 'SMTP disabled'}
+
+    sent_count = 0
+    failed_count = 0
+
+    async def send_emails():
+        nonlocal sent_count, failed_count
+
+        smtp = None
+        try:
+            for email in emails:
+                message = _build_message(
+                    email['to_email'],
+                    email['subject'],
+                    email['body_html'],
+                    email.get('body_text')
+                )
+                # One retry on a fresh connection if the server hung up
+                for attempt in range(2):
+                    if smtp is None:
+                        smtp = _smtp_client()
+                        await smtp.connect()
+                    try:
+                        await smtp.send_message(message)
+                        sent_count += 1
+                    except aiosmtplib.SMTPServerDisconnected as e:
+                        smtp = None
+                        if attempt == 0:
+                            logger.warning(f"SMTP server disconnected, reconnecting: {e}")
+                            continue
+                        failed_count += 1
+                        logger.error(f"Failed to send email to {email['to_email']}: {e}")
+                    except (aiosmtplib.SMTPRecipientsRefused, aiosmtplib.SMTPResponseException) as e:
+                        failed_count += 1
+                        logger.error(f"Failed to send email to {email['to_email']}: {e}")
+                    break
+        finally:
+            if smtp is not None and smtp.is_connected:
+                try:
+                    await smtp.quit()
+                except aiosmtplib.SMTPException:
+                    smtp.close()
+
+    try:
+        run_async(send_emails())
+    except Exception as e:
+        logger.error(f"Email batch failed after {sent_count} sent: {e}")
+        return {
+            'status': 'error',
+            'message': str(e),
+            'sent_count': sent_count,
+            'failed_count': len(emails) - sent_count
+        }
+
+    logger.info(f"Email batch completed: {sent_count} sent, {failed_count} failed")
+    return {'status': 'success', 'sent_count': sent_count, 'failed_count': failed_count}
@@ -0,0 +1,63 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from auth.dependencies import get_current_user
+from core.config import settings
+from core.database import get_db
+from core.models import Base, User
+from files import router as files_router
+from main import app
+from storage import LocalStorage, get_storage
+
+
+@pytest.fixture
+def local_storage(tmp_path, monkeypatch):
+    """LocalStorage rooted in a temporary directory"""
+    monkeypatch.setattr(settings, "storage_path", str(tmp_path))
+    return LocalStorage()
+
+
+@pytest.fixture
+def session_factory():
+    """In-memory SQLite database shared by every session of a test"""
+    engine = create_engine(
+        "sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine, expire_on_commit=False)
+    engine.dispose()
+
+
+@pytest.fixture
+def user(session_factory):
+    with session_factory() as db:
+        db_user = User(email="user@example.com", hashed_password="x")
+        db.add(db_user)
+        db.commit()
+        return db_user
+
+
+@pytest.fixture
+def client(session_factory, user, local_storage):
+    """API client authenticated as `user`, backed by SQLite and local storage"""
+    def _get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def _get_storage():
+        return local_storage
+
+    app.dependency_overrides[get_db] = _get_db
+    app.dependency_overrides[get_current_user] = lambda: user
+    app.dependency_overrides[get_storage] = _get_storage
+    files_router._upload_cache.clear()
+    # No `with`: the lifespan (storage init, audit flusher) isn't needed here
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+    files_router._upload_cache.clear()
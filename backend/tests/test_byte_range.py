@@ -0,0 +1,32 @@
+import pytest
+from fastapi import HTTPException
+
+from files.router import parse_byte_range
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        (None, None),
+        ("bytes=0-99", (0, 99)),
+        ("bytes=100-", (100, 999)),
+        ("bytes=-100", (900, 999)),
+        ("bytes=-5000", (0, 999)),
+        ("bytes=990-5000", (990, 999)),
+        # Unsupported or malformed ranges fall back to the whole file
+        ("bytes=0-10,20-30", None),
+        ("items=0-10", None),
+        ("bytes=a-b", None),
+    ],
+)
+def test_parse_byte_range(header, expected):
+    assert parse_byte_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=50-10"])
+def test_parse_byte_range_unsatisfiable(header):
+    with pytest.raises(HTTPException) as exc_info:
+        parse_byte_range(header, 1000)
+
+    assert exc_info.value.status_code == 416
+    assert exc_info.value.headers == {"Content-Range": "bytes */1000"}
@@ -0,0 +1,97 @@
+import uuid
+
+from sqlalchemy import update
+
+from core.models import FileMetadata
+
+FILE_META = {
+    "original_filename_encrypted": "name",
+    "size_bytes": 10,
+    "mime_type": "application/octet-stream",
+    "wrapped_dek": "dek",
+}
+
+
+def _init(client):
+    response = client.post("/files/upload/init", json=FILE_META)
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+def _send_chunk(client, file_id, chunk_number, data):
+    return client.post(
+        f"/files/upload/{file_id}/chunk",
+        data={"chunk_number": str(chunk_number)},
+        files={"chunk": ("chunk", data)},
+    )
+
+
+def _upload(client, chunks):
+    file_id = _init(client)
+    for chunk_number, data in enumerate(chunks):
+        assert _send_chunk(client, file_id, chunk_number, data).status_code == 200
+    response = client.post(f"/files/upload/{file_id}/complete", json={"total_chunks": len(chunks)})
+    assert response.status_code == 200
+    return file_id, response.json()
+
+
+def test_upload_and_download(client):
+    file_id, body = _upload(client, [b"hello ", b"world"])
+    assert body["upload_status"] == "complete"
+
+    response = client.get(f"/files/download/{file_id}")
+    assert response.status_code == 200
+    assert response.content == b"hello world"
+
+
+def test_download_byte_range(client):
+    file_id, _ = _upload(client, [b"0123456789"])
+
+    response = client.get(f"/files/download/{file_id}", headers={"Range": "bytes=2-5"})
+    assert response.status_code == 206
+    assert response.content == b"2345"
+    assert response.headers["Content-Range"] == "bytes 2-5/10"
+
+    response = client.get(f"/files/download/{file_id}", headers={"Range": "bytes=20-"})
+    assert response.status_code == 416
+    assert response.headers["Content-Range"] == "bytes */10"
+
+
+def test_complete_is_idempotent(client):
+    file_id, first = _upload(client, [b"data"])
+
+    response = client.post(f"/files/upload/{file_id}/complete", json={"total_chunks": 1})
+    assert response.status_code == 200
+    assert response.json() == first
+
+
+def test_chunk_for_completed_upload_conflicts(client):
+    file_id, _ = _upload(client, [b"data"])
+
+    assert _send_chunk(client, file_id, 1, b"late").status_code == 409
+
+
+def test_complete_for_failed_upload_conflicts(client, session_factory):
+    file_id = _init(client)
+    with session_factory() as db:
+        db.execute(
+            update(FileMetadata)
+            .where(FileMetadata.id == uuid.UUID(file_id))
+            .values(upload_status="failed")
+        )
+        db.commit()
+
+    response = client.post(f"/files/upload/{file_id}/complete", json={"total_chunks": 0})
+    assert response.status_code == 409
+
+
+def test_chunk_number_out_of_range(client):
+    file_id = _init(client)
+
+    assert _send_chunk(client, file_id, -1, b"x").status_code == 422
+    assert _send_chunk(client, file_id, 10000, b"x").status_code == 422
+
+
+def test_unknown_file(client):
+    assert _send_chunk(client, uuid.uuid4(), 0, b"x").status_code == 404
+    assert client.get(f"/files/download/{uuid.uuid4()}").status_code == 404
@@ -0,0 +1,75 @@
+import io
+import uuid
+
+import pytest
+
+from storage import UploadNotInProgressError
+
+
+async def _upload(storage, file_id, user_id, chunks):
+    for chunk_number, data in enumerate(chunks):
+        await storage.upload_chunk(file_id, chunk_number, io.BytesIO(data), len(data), user_id)
+
+
+async def _read(storage, file_id, user_id, **kwargs):
+    return b"".join([chunk async for chunk in storage.download_file(file_id, user_id, **kwargs)])
+
+
+@pytest.mark.asyncio
+async def test_upload_finalize_download(local_storage):
+    file_id, user_id = uuid.uuid4(), uuid.uuid4()
+    chunks = [b"a" * 3000, b"b" * (2 << 20), b"c"]
+
+    await _upload(local_storage, file_id, user_id, chunks)
+    await local_storage.finalize_upload(file_id, len(chunks), user_id)
+
+    data = b"".join(chunks)
+    assert await local_storage.get_file_size(file_id, user_id) == len(data)
+    assert await _read(local_storage, file_id, user_id) == data
+    assert await _read(local_storage, file_id, user_id, start=2990, end=3009) == data[2990:3010]
+    # The chunks directory is removed once the file is assembled
+    chunk_path = local_storage._get_chunk_path(file_id, 0, user_id)
+    assert not chunk_path.parent.exists()
+
+
+@pytest.mark.asyncio
+async def test_chunk_after_finalize_is_rejected(local_storage):
+    file_id, user_id = uuid.uuid4(), uuid.uuid4()
+    await _upload(local_storage, file_id, user_id, [b"data"])
+    await local_storage.finalize_upload(file_id, 1, user_id)
+
+    with pytest.raises(UploadNotInProgressError):
+        await _upload(local_storage, file_id, user_id, [b"late"])
+    assert not local_storage._get_chunk_path(file_id, 0, user_id).parent.exists()
+
+
+@pytest.mark.asyncio
+async def test_finalize_with_missing_chunk_keeps_chunks(local_storage):
+    file_id, user_id = uuid.uuid4(), uuid.uuid4()
+    await _upload(local_storage, file_id, user_id, [b"first"])
+
+    with pytest.raises(Exception, match="Chunk 1 not found"):
+        await local_storage.finalize_upload(file_id, 2, user_id)
+    assert local_storage._get_chunk_path(file_id, 0, user_id).exists()
+
+
+@pytest.mark.asyncio
+async def test_abort_upload_removes_chunks(local_storage):
+    file_id, user_id = uuid.uuid4(), uuid.uuid4()
+    await _upload(local_storage, file_id, user_id, [b"one", b"two"])
+
+    assert await local_storage.abort_upload(file_id, user_id)
+    assert not local_storage._get_chunk_path(file_id, 0, user_id).parent.exists()
+    # Aborting again (or an upload that never stored anything) is a no-op
+    assert await local_storage.abort_upload(file_id, user_id)
+    assert await local_storage.abort_upload(uuid.uuid4(), user_id)
+
+
+@pytest.mark.asyncio
+async def test_missing_file(local_storage):
+    file_id, user_id = uuid.uuid4(), uuid.uuid4()
+
+    with pytest.raises(FileNotFoundError):
+        await local_storage.get_file_size(file_id, user_id)
+    # Cleanup treats an already-missing file as deleted
+    assert await local_storage.delete_files([(file_id, user_id)]) == {file_id}
@@ -0,0 +1,15 @@
+import pytest
+from pydantic import ValidationError
+
+from files.schemas import FileUploadComplete
+
+
+@pytest.mark.parametrize("total_chunks", [0, 1, 10000])
+def test_upload_complete_accepts_part_count(total_chunks):
+    assert FileUploadComplete(total_chunks=total_chunks).total_chunks == total_chunks
+
+
+@pytest.mark.parametrize("body", [{}, {"total_chunks": -1}, {"total_chunks": 10001}])
+def test_upload_complete_rejects_invalid_body(body):
+    with pytest.raises(ValidationError):
+        FileUploadComplete(**body)
@@ -10,7 +10,7 @@ import { useAuthStore } from '../store/auth';
 import * as crypto from '../lib/crypto';
 
 const API_URL = 'http://localhost:8000';
-const CHUNK_SIZE = 4 * 1024 * 1024; // 4MB
+const CHUNK_SIZE = 8 * 1024 * 1024; // 8MB (S3/MinIO multipart parts must be >= 5MB)
 
 export function FileUpload() {
   const token = useAuthStore((state) => state.token);
@@ -63,23 +63,26 @@ export function FileUpload() {
 
         // 6. Upload the file in chunks
         let offset = 0;
+        let chunkNumber = 0;
         while (offset < file.size) {
             const chunk = file.slice(offset, offset + CHUNK_SIZE);
             const encryptedChunk = await crypto.encryptChunk(await chunk.arrayBuffer(), dek);
 
             const formData = new FormData();
             formData.append('chunk', new Blob([encryptedChunk]));
+            formData.append('chunk_number', String(chunkNumber));
 
             await axios.post(`${API_URL}/files/upload/${fileId}/chunk`, formData, {
                 headers: { Authorization: `Bearer ${token}` },
             });
 
             offset += CHUNK_SIZE;
+            chunkNumber += 1;
             setProgress(Math.min(Math.round((offset / file.size) * 100), 100));
         }
 
         // 7. Finalize the upload
-        await axios.post(`${API_URL}/files/upload/${fileId}/complete`, {}, {
+        await axios.post(`${API_URL}/files/upload/${fileId}/complete`, { total_chunks: chunkNumber }, {
             headers: { Authorization: `Bearer ${token}` },
         });
 